@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the Excel layout stage: merged-cell width lookup and column offsets.
+
+Compares the original per-cell scan over ws.merged_cells.ranges (plus sum(col_widths[:j]))
+with the precomputed SheetLayout tables on a synthetic sheet with 10k+ merged ranges.
+The original scan costs O(cells x merged ranges) and would take hours at this size, so it
+stops after --naive-seconds and its full-sheet time is extrapolated linearly from the rows it
+finished; the indexed layout is timed on the whole sheet. Pass --font to also time a full
+convert_excel_to_pdf run.
+
+Usage:
+    python benchmarks/bench_excel_layout.py --rows 6000 --cols 12 [--naive-seconds 10] [--font ipaexg.ttf]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from openpyxl import Workbook
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from office_pdf_converter.excel_to_pdf_converter import ExcelToPDFConverter, SheetLayout
+
+
+def build_workbook(path, rows, cols):
+    # Every row gets cols // 2 merged ranges of two columns each. The ranges are assigned in one
+    # go like openpyxl's reader does: ws.merge_cells checks each new range against all earlier
+    # ones, which alone takes minutes for 10k+ ranges (the covered cells are empty anyway)
+    wb = Workbook()
+    ws = wb.active
+    ranges = []
+    for r in range(1, rows + 1):
+        for c in range(1, cols + 1, 2):
+            ws.cell(row=r, column=c, value=f"R{r}C{c}")
+            if c + 1 <= cols:
+                ranges.append(CellRange(min_row=r, min_col=c, max_row=r, max_col=c + 1))
+    ws.merged_cells = MultiCellRange(ranges)
+    wb.save(path)
+    return len(ws.merged_cells.ranges)
+
+
+def naive_layout(ws, col_widths, time_limit):
+    # Original algorithm: linear scan of merged ranges and prefix re-summing per cell.
+    # Stops after the first row that ends past time_limit seconds; returns (total, rows done)
+    merged_ranges = ws.merged_cells.ranges
+    total = 0.0
+    deadline = time.perf_counter() + time_limit
+    row_number = 0
+    for row_number, row in enumerate(ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column), start=1):
+        if row_number > 1 and time.perf_counter() > deadline:
+            return total, row_number - 1
+        for j, cell in enumerate(row):
+            if cell.value is None:
+                continue
+            width = col_widths[j]
+            for merged_range in merged_ranges:
+                if cell.coordinate in merged_range:
+                    width = sum(col_widths[merged_range.min_col - 1:merged_range.max_col])
+                    break
+            total += width + sum(col_widths[:j])
+    return total, row_number
+
+
+def indexed_layout(ws, col_widths, max_row):
+    layout = SheetLayout(col_widths, ws.merged_cells.ranges)
+    total = 0.0
+    for row_number, row in enumerate(ws.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=ws.max_column), start=1):
+        for j, cell in enumerate(row):
+            if cell.value is None:
+                continue
+            total += layout.cell_width(row_number, j + 1) + layout.col_offsets[j]
+    return total
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--cols", type=int, default=12)
+    parser.add_argument("--naive-seconds", type=float, default=10,
+                        help="time limit of the original scan; its full-sheet time is extrapolated")
+    parser.add_argument("--font", help="TTF font path; enables the full conversion benchmark")
+    args = parser.parse_args()
+
+    from openpyxl import load_workbook
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx_path = os.path.join(tmp, "bench.xlsx")
+        merged_count = build_workbook(xlsx_path, args.rows, args.cols)
+        ws = load_workbook(xlsx_path, data_only=True).active
+        col_widths = [10.0] * ws.max_column
+        print(f"Sheet: {ws.max_row} rows x {ws.max_column} cols, {merged_count} merged ranges")
+
+        (naive_total, naive_rows), naive_time = timed(naive_layout, ws, col_widths, args.naive_seconds)
+        assert abs(naive_total - indexed_layout(ws, col_widths, naive_rows)) < 1e-6 * max(1.0, naive_total)
+        naive_estimate = naive_time * ws.max_row / naive_rows
+        _, indexed_time = timed(indexed_layout, ws, col_widths, ws.max_row)
+        print(f"Naive layout:   {naive_time:.3f} s for {naive_rows} rows, ~{naive_estimate:.1f} s estimated for all rows")
+        print(f"Indexed layout: {indexed_time:.3f} s for all rows")
+        print(f"Speedup:        ~{naive_estimate / indexed_time:.0f}x")
+
+        if args.font:
+            converter = ExcelToPDFConverter(args.font)
+            _, convert_time = timed(converter.convert_excel_to_pdf, xlsx_path, os.path.join(tmp, "bench.pdf"))
+            print(f"Full conversion: {convert_time:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
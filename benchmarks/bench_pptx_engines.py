@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the two PPTX engines of PPTToPDFConverter on a corpus of decks.
+
+For every deck, both the 'html' (xhtml2pdf) and 'reportlab' (direct canvas) engines are
+timed, and the output is checked for fidelity:
+- pages:  number of PDF pages vs. number of slides (the reportlab engine maps 1:1)
+- text:   share of the deck's words that can be extracted from the PDF again
+
+Usage:
+    python benchmarks/bench_pptx_engines.py DECK_DIR --font ipaexg.ttf
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+from pptx import Presentation
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from office_pdf_converter.ppt_to_pdf_converter import PPTToPDFConverter
+
+ENGINES = ('html', 'reportlab')
+
+
+def deck_words(pptx_path):
+    # All whitespace-separated words of the deck's text frames and tables
+    words = []
+    for slide in Presentation(pptx_path).slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                words.extend(shape.text_frame.text.split())
+            elif getattr(shape, 'has_table', False) and shape.has_table:
+                for row in shape.table.rows:
+                    for cell in row.cells:
+                        words.extend(cell.text.split())
+    return words
+
+
+def pdf_fidelity(pdf_path, words):
+    with fitz.open(pdf_path) as pdf_document:
+        page_count = pdf_document.page_count
+        pdf_text = "".join(page.get_text() for page in pdf_document)
+    # Line wrapping may split words, so compare with whitespace removed
+    pdf_text = "".join(pdf_text.split())
+    found = sum(1 for word in words if word in pdf_text)
+    return page_count, found / len(words) if words else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("deck_dir", help="folder containing .pptx files")
+    parser.add_argument("--font", required=True, help="TTF font path")
+    args = parser.parse_args()
+
+    decks = sorted(glob.glob(os.path.join(args.deck_dir, "*.pptx")))
+    if not decks:
+        sys.exit(f"No .pptx files found in {args.deck_dir}")
+
+    totals = {engine: [0.0, 0] for engine in ENGINES}
+    print(f"{'deck':<40} {'slides':>6} " + " ".join(f"{engine + ' s':>12} {'pages':>5} {'text':>6}" for engine in ENGINES))
+    with tempfile.TemporaryDirectory() as tmp:
+        for deck in decks:
+            slide_count = len(Presentation(deck).slides)
+            words = deck_words(deck)
+            columns = []
+            for engine in ENGINES:
+                pdf_path = os.path.join(tmp, f"{engine}.pdf")
+                converter = PPTToPDFConverter(deck, pdf_path, args.font)
+                start = time.perf_counter()
+                converter.convert_ppt_to_pdf(engine=engine)
+                elapsed = time.perf_counter() - start
+                page_count, text_ratio = pdf_fidelity(pdf_path, words)
+                totals[engine][0] += elapsed
+                totals[engine][1] += slide_count
+                columns.append(f"{elapsed:>12.2f} {page_count:>5} {text_ratio:>6.1%}")
+            print(f"{os.path.basename(deck)[:40]:<40} {slide_count:>6} " + " ".join(columns))
+
+    for engine, (elapsed, slides) in totals.items():
+        print(f"{engine}: {slides} slides in {elapsed:.2f} s ({slides / elapsed if elapsed else 0:.1f} slides/s)")
+
+
+if __name__ == "__main__":
+    main()
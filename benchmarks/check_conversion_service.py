@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Smoke test of the conversion service on localhost.
+
+Starts a ConversionService on a free port and checks over HTTP that every sample file
+converts and its result downloads, and that bad requests get the documented errors:
+400 for a missing, invalid or negative Content-Length and for an unsupported file type,
+413 for an oversized upload, 429 when the queue is full and 404 for an unknown job.
+
+Usage:
+    python benchmarks/check_conversion_service.py -f ipaexg.ttf sample.docx sample.xlsx sample.pdf
+
+Exits with status 1 if any check fails.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from office_pdf_converter.conversion_service import ConversionService
+
+RESULT_TYPES = {'pdf_images': 'application/zip'}
+
+
+def request(port, method, path, body=None, headers=None):
+    """
+    :return: (int, str, bytes), HTTP status, Content-Type and response body
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.putrequest(method, path)
+        for name, value in (headers or {}).items():
+            connection.putheader(name, value)
+        connection.endheaders(body)
+        response = connection.getresponse()
+        return response.status, response.getheader('Content-Type'), response.read()
+    finally:
+        connection.close()
+
+
+def upload(port, path, data=None):
+    data = open(path, 'rb').read() if data is None else data
+    return request(port, 'POST', f'/convert?filename={os.path.basename(path)}', data,
+                   {'Content-Length': str(len(data))})
+
+
+def wait_for_job(port, job_id, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, _, body = request(port, 'GET', f'/jobs/{job_id}')
+        status = json.loads(body)
+        if status['status'] not in ('queued', 'running'):
+            return status
+        time.sleep(0.2)
+    return {'status': 'no answer', 'error': f"still running after {timeout} s"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smoke test the conversion service on localhost.")
+    parser.add_argument('samples', nargs='+', help=".docx/.xlsx/.pptx/.pdf files to convert")
+    parser.add_argument('-f', '--font', required=True, help="TTF font for the Office converters")
+    parser.add_argument('--job-timeout', type=float, default=300, help="seconds per job")
+    args = parser.parse_args(argv)
+
+    checks = []
+
+    def check(name, ok, detail=''):
+        checks.append(ok)
+        print(f"{'ok' if ok else 'FAILED':<7} {name}{': ' + detail if detail and not ok else ''}")
+
+    # The upload limit just admits the largest sample
+    max_upload_mb = max(os.path.getsize(sample) for sample in args.samples) // (1024 * 1024) + 1
+    work_dir = tempfile.TemporaryDirectory(prefix='check_conversion_service_')
+    service = ConversionService(args.font, work_dir.name, workers=1, queue_size=1, job_timeout=args.job_timeout,
+                                max_upload_mb=max_upload_mb)
+    service.start(port=0)
+    port = service.server_address[1]
+    try:
+        for sample in args.samples:
+            code, _, body = upload(port, sample)
+            if code != 202:
+                check(f"convert {sample}", False, f"POST returned {code} {body!r}")
+                continue
+            job_id = json.loads(body)['job_id']
+            status = wait_for_job(port, job_id, args.job_timeout + 60)
+            if status['status'] != 'done':
+                check(f"convert {sample}", False, f"{status['status']}: {status.get('error')}")
+                continue
+            code, content_type, body = request(port, 'GET', f'/jobs/{job_id}/result')
+            expected = RESULT_TYPES.get(status['kind'], 'application/pdf')
+            check(f"convert {sample}", code == 200 and content_type == expected and len(body) > 0,
+                  f"result returned {code} {content_type}, {len(body)} bytes")
+
+        sample = args.samples[0]
+        for name, headers, expected in [
+            ("missing Content-Length", {}, 400),
+            ("invalid Content-Length", {'Content-Length': 'abc'}, 400),
+            ("negative Content-Length", {'Content-Length': '-1'}, 400),
+            ("oversized upload", {'Content-Length': str(max_upload_mb * 1024 * 1024 + 1)}, 413),
+        ]:
+            code, _, _ = request(port, 'POST', f'/convert?filename={os.path.basename(sample)}', None, headers)
+            check(name, code == expected, f"got {code}, expected {expected}")
+
+        code, _, _ = upload(port, 'notes.txt', b'text')
+        check("unsupported file type", code == 400, f"got {code}, expected 400")
+        code, _, _ = request(port, 'GET', '/jobs/0123456789abcdef/result')
+        check("unknown job", code == 404, f"got {code}, expected 404")
+
+        # One job runs and one waits: the rest of a burst must be refused
+        codes = [upload(port, sample)[0] for _ in range(4)]
+        check("full queue", 429 in codes and 202 in codes, f"got {codes}")
+    finally:
+        service.shutdown()
+        work_dir.cleanup()
+
+    print(f"\n{sum(checks)} of {len(checks)} check(s) passed")
+    return 0 if all(checks) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Check of the Excel converter on a workbook with an empty worksheet.
+
+Builds a workbook with two small sheets and a blank one, and checks that every way of
+converting it writes a readable PDF with the expected number of pages: the active sheet in
+normal and streaming mode, and convert_workbook_to_pdf on all sheets, on the blank sheet
+alone and on the sheets with data. An empty sheet renders as one blank page.
+
+Usage:
+    python benchmarks/check_excel_sheets.py -f ipaexg.ttf
+
+Exits with status 1 if any check fails.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import fitz  # PyMuPDF
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from office_pdf_converter.excel_to_pdf_converter import ExcelToPDFConverter
+
+
+def build_workbook(path, active_empty=False):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "A"
+    for row in range(1, 60):
+        ws.append([f"a{row}", row])
+    wb.create_sheet("B").append(["b", 1])
+    wb.create_sheet("Empty")
+    if active_empty:
+        wb.active = wb.sheetnames.index("Empty")
+    wb.save(path)
+
+
+def page_count(pdf_path):
+    with fitz.open(pdf_path) as pdf:
+        return pdf.page_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the Excel converter on a workbook with an empty sheet.")
+    parser.add_argument('-f', '--font', required=True, help="TTF font used in the PDF")
+    args = parser.parse_args(argv)
+
+    converter = ExcelToPDFConverter(args.font)
+    checks = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx_path = os.path.join(tmp, "sheets.xlsx")
+        empty_path = os.path.join(tmp, "empty_active.xlsx")
+        build_workbook(xlsx_path)
+        build_workbook(empty_path, active_empty=True)
+        pdf_path = os.path.join(tmp, "out.pdf")
+
+        # Sheet A fills 3 pages, B and Empty one each
+        cases = [
+            ("active sheet", lambda: converter.convert_excel_to_pdf(xlsx_path, pdf_path), 3),
+            ("empty active sheet", lambda: converter.convert_excel_to_pdf(empty_path, pdf_path), 1),
+            ("empty active sheet, streaming",
+             lambda: converter.convert_excel_to_pdf(empty_path, pdf_path, streaming=True), 1),
+            ("sheets A and B", lambda: converter.convert_workbook_to_pdf(xlsx_path, pdf_path, ["A", "B"]), 4),
+            ("empty sheet only", lambda: converter.convert_workbook_to_pdf(xlsx_path, pdf_path, ["Empty"]), 1),
+            ("all sheets", lambda: converter.convert_workbook_to_pdf(xlsx_path, pdf_path), 5),
+        ]
+        for name, convert, expected in cases:
+            try:
+                convert()
+                pages = page_count(pdf_path)
+            except Exception as e:
+                ok, detail = False, f"{type(e).__name__}: {e}"
+            else:
+                ok, detail = pages == expected, f"{pages} page(s), expected {expected}"
+            checks.append(ok)
+            print(f"{'ok' if ok else 'FAILED':<7} {name}{': ' + detail if not ok else ''}")
+
+    print(f"\n{sum(checks)} of {len(checks)} check(s) passed")
+    return 0 if all(checks) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
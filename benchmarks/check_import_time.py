@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Check the import time of the package entry points against a budget.
+
+Each scenario imports one module in a fresh interpreter with -X importtime. Its cost is the
+summed self time of every module that the statement imported beyond interpreter start-up,
+best of several runs: noise from other processes only ever adds time, so the minimum is the
+stable figure to gate on. A scenario fails when it exceeds its budget or loads a
+backend it must not need, e.g. the pdf2img path loading reportlab or the Office parsers.
+
+Usage:
+    python benchmarks/check_import_time.py [--runs 5] [--scale 1.0]
+
+Exits with status 1 if any scenario fails.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# Every Office/PDF backend
+HEAVY_MODULES = {'fitz', 'pymupdf', 'PIL', 'reportlab', 'xhtml2pdf', 'mammoth', 'bs4', 'lxml', 'pptx', 'openpyxl',
+                 'xmltodict'}
+
+# (name, module to import, budget in milliseconds, top-level modules that must not be loaded)
+# Budgets are about twice the best times seen on a development machine, so they catch a new
+# heavy import rather than scheduling noise; the forbidden modules are checked exactly.
+SCENARIOS = [
+    ('package', 'office_pdf_converter', 20, HEAVY_MODULES),
+    ('cli', 'office_pdf_converter.cli', 30, HEAVY_MODULES),
+    ('batch', 'office_pdf_converter.batch_converter', 90, HEAVY_MODULES),
+    ('service', 'office_pdf_converter.conversion_service', 160, HEAVY_MODULES),
+    ('pdf2img', 'office_pdf_converter.pdf_to_Image_converter', 400, HEAVY_MODULES - {'fitz', 'pymupdf'}),
+    ('fi', 'office_pdf_converter.fi_index', 20, HEAVY_MODULES),
+    ('gazette', 'office_pdf_converter.gazette_extractor', 100, HEAVY_MODULES),
+]
+
+
+def import_profile(statement):
+    """
+    :param statement: str, Python code run with -X importtime
+    :return: dict, module name -> self import time in microseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(self_us)
+    return profile
+
+
+def measure(module, runs):
+    # Best import cost (ms) over runs and the set of modules loaded on top of interpreter start-up
+    startup = set(import_profile('pass'))
+    timings, loaded = [], set()
+    for _ in range(runs):
+        profile = import_profile(f'import {module}')
+        added = {name: self_us for name, self_us in profile.items() if name not in startup}
+        timings.append(sum(added.values()) / 1000)
+        loaded |= set(added)
+    return min(timings), loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check import times against their budgets.")
+    parser.add_argument('--runs', type=int, default=5, help="runs per scenario (the best is used)")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every budget, e.g. 2 on slow machines")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    print(f"{'scenario':<10} {'ms':>8} {'budget':>8}  result")
+    for name, module, budget, forbidden in SCENARIOS:
+        milliseconds, loaded = measure(module, args.runs)
+        budget *= args.scale
+        unwanted = sorted({loaded_name.split('.')[0] for loaded_name in loaded} & forbidden)
+        problems = []
+        if milliseconds > budget:
+            problems.append("over budget")
+        if unwanted:
+            problems.append("loads " + ", ".join(unwanted))
+        failures += bool(problems)
+        print(f"{name:<10} {milliseconds:>8.1f} {budget:>8.0f}  {'; '.join(problems) or 'ok'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
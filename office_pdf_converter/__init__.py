@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Office-PDF-Converter: convert Word, Excel and PowerPoint files to PDF and PDF pages to images.
+
+Importing the package is cheap: each converter is imported, together with its backend
+(mammoth/xhtml2pdf, openpyxl/reportlab, python-pptx, PyMuPDF), the first time it is
+accessed, so converting a PDF to images never loads the Office toolchain.
+"""
+
+import importlib
+
+__version__ = '0.1.0'
+
+# Public name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    'WordToPDFConverter': 'word_to_pdf_converter',
+    'ExcelToPDFConverter': 'excel_to_pdf_converter',
+    'PPTToPDFConverter': 'ppt_to_pdf_converter',
+    'PPTXCanvasRenderer': 'pptx_canvas_renderer',
+    'PDFToImageConverter': 'pdf_to_Image_converter',
+    'BatchConverter': 'batch_converter',
+    'convert_file': 'batch_converter',
+    'ConversionCache': 'conversion_cache',
+    'ConversionService': 'conversion_service',
+    'Instrumentation': 'instrumentation',
+    'register_font': 'font_registry',
+    'merge_pdf_files': 'pdf_utils',
+    'merge_pdf_bytes': 'pdf_utils',
+    'FICodeStore': 'fi_index',
+    'build_fi_index': 'fi_index',
+    'extract_gazette': 'gazette_extractor',
+    'extract_gazette_batch': 'gazette_extractor',
+    'MissingFieldError': 'gazette_extractor',
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module_name, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Entry point for python -m office_pdf_converter.
+"""
+
+from .cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Batch conversion of mixed Office/PDF files.
+
+Inputs (files, folders, or manifest files listing one path per line) are dispatched by
+extension to WordToPDFConverter, ExcelToPDFConverter, PPTToPDFConverter or
+PDFToImageConverter and run on a process pool. Workers import the converter modules and
+register the font once at startup, and jobs are scheduled largest file first so a big
+file picked up last does not leave the other workers idle. With a cache folder, outputs are
+served from a ConversionCache when the same input was converted before with the same
+font and options.
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .conversion_cache import ConversionCache
+from .instrumentation import Instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Extension -> converter kind
+CONVERTER_KINDS = {
+    '.docx': 'word',
+    '.xlsx': 'excel',
+    '.xlsm': 'excel',
+    '.pptx': 'ppt',
+    '.pdf': 'pdf_images',
+}
+
+# Converter kind -> module holding the converter class
+CONVERTER_MODULES = {
+    'word': 'word_to_pdf_converter',
+    'excel': 'excel_to_pdf_converter',
+    'ppt': 'ppt_to_pdf_converter',
+    'pdf_images': 'pdf_to_Image_converter',
+}
+
+MANIFEST_EXTENSIONS = ('.txt', '.lst')
+
+
+def converter_kind(input_path):
+    """
+    :param input_path: str, path to an input file
+    :return: str, converter kind for the file extension, or None if unsupported
+    """
+    return CONVERTER_KINDS.get(os.path.splitext(input_path)[1].lower())
+
+
+def collect_inputs(sources):
+    """
+    Expand folders and manifest files into the list of convertible files.
+
+    :param sources: list of str, files, folders (searched recursively) or manifest files
+                    (.txt/.lst, one path per line, relative paths resolved against the manifest)
+    :return: list of str, paths of supported input files, without duplicates
+    """
+    inputs = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for filename in sorted(files):
+                    if converter_kind(filename):
+                        inputs.append(os.path.join(root, filename))
+        elif source.lower().endswith(MANIFEST_EXTENSIONS):
+            base_dir = os.path.dirname(os.path.abspath(source))
+            with open(source, 'r', encoding='utf-8') as manifest_file:
+                for line in manifest_file:
+                    path = line.strip()
+                    if path and not path.startswith('#'):
+                        inputs.append(os.path.join(base_dir, path))
+        else:
+            inputs.append(source)
+    return list(dict.fromkeys(os.path.abspath(path) for path in inputs))
+
+
+def cache_key(cache, input_path, font_path=None, options=None):
+    """
+    :param cache: ConversionCache
+    :param input_path: str, path to a supported input file
+    :param font_path: str, path to the font file (not part of the key for PDF -> images)
+    :param options: dict, keyword arguments for the conversion method of this converter kind
+    :return: str, key of the conversion in cache
+    """
+    kind = converter_kind(input_path)
+    return cache.key(input_path, kind, font_path if kind != 'pdf_images' else None, options)
+
+
+def output_target(input_path, output_path):
+    # PDFToImageConverter writes to <base folder>/<pdf name>/
+    if converter_kind(input_path) == 'pdf_images':
+        return os.path.join(output_path, os.path.splitext(os.path.basename(input_path))[0])
+    return output_path
+
+
+def convert_file(input_path, output_path, font_path, options=None, cache=None, instrumentation=None, key=None):
+    """
+    Convert one file with the converter matching its extension.
+
+    :param input_path: str, path to the input file
+    :param output_path: str, output PDF path (or output base folder for PDF -> images)
+    :param font_path: str, path to the font file (unused for PDF -> images)
+    :param options: dict, keyword arguments for the conversion method of this converter kind;
+                    for excel, all_sheets=True converts every worksheet (convert_workbook_to_pdf)
+    :param cache: ConversionCache, checked before converting and filled afterwards (optional)
+    :param instrumentation: Instrumentation, passed to the converter (optional)
+    :param key: str, cache key from cache_key() if already computed, so the input is not hashed again
+    :return: (str, bool), path of the written PDF or image folder, and whether it came from the cache
+    """
+    kind = converter_kind(input_path)
+    if kind is None:
+        raise ValueError(f"Unsupported file type: {input_path}")
+    if cache is None:
+        return _convert(kind, input_path, output_path, font_path, options or {}, instrumentation), False
+
+    if key is None:
+        key = cache_key(cache, input_path, font_path, options)
+    target = output_target(input_path, output_path)
+    if cache.fetch(key, target):
+        return target, True
+    produced = _convert(kind, input_path, output_path, font_path, options or {}, instrumentation)
+    cache.store(key, produced)
+    return produced, False
+
+
+def _convert(kind, input_path, output_path, font_path, options, instrumentation):
+    if kind == 'word':
+        from .word_to_pdf_converter import WordToPDFConverter
+        converter = WordToPDFConverter(input_path, output_path, font_path, instrumentation=instrumentation)
+        errors = converter.convert_word_to_pdf(**options)
+        if errors:
+            raise RuntimeError(f"HTML -> PDF conversion failed in {errors} part(s); the PDF is incomplete")
+    elif kind == 'excel':
+        from .excel_to_pdf_converter import ExcelToPDFConverter
+        converter = ExcelToPDFConverter(font_path, instrumentation=instrumentation)
+        options = dict(options)
+        if options.pop('all_sheets', False):
+            converter.convert_workbook_to_pdf(input_path, output_path, **options)
+        else:
+            converter.convert_excel_to_pdf(input_path, output_path, **options)
+    elif kind == 'ppt':
+        from .ppt_to_pdf_converter import PPTToPDFConverter
+        converter = PPTToPDFConverter(input_path, output_path, font_path, instrumentation=instrumentation)
+        errors = converter.convert_ppt_to_pdf(**options)
+        if errors:
+            raise RuntimeError(f"HTML -> PDF conversion failed in {errors} part(s); the PDF is incomplete")
+    elif kind == 'pdf_images':
+        from .pdf_to_Image_converter import PDFToImageConverter
+        converter = PDFToImageConverter(input_path, output_path, instrumentation=instrumentation)
+        errors = converter.convert_pdf_to_images(**options)
+        if errors:
+            raise RuntimeError(f"{len(errors)} page(s) failed: " + "; ".join(f"page {page}: {error}" for page, error in sorted(errors.items())))
+        return converter.output_folder
+    return output_path
+
+
+def _init_worker(font_path, kinds):
+    # Import the heavy converter stacks and parse the font once per worker process
+    for kind in kinds:
+        importlib.import_module('.' + CONVERTER_MODULES[kind], __package__)
+    if font_path and kinds - {'pdf_images'}:
+        from .font_registry import register_font
+        register_font(font_path)
+
+
+def _run_job(input_path, output_path, font_path, options, cache, instrumentation, key=None):
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path, 'bytes': os.path.getsize(input_path), 'cached': False}
+    try:
+        result['output'], result['cached'] = convert_file(input_path, output_path, font_path, options, cache,
+                                                          instrumentation, key)
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+class BatchConverter:
+    def __init__(self, output_dir, font_path, max_workers=None, options=None, cache_dir=None, cache_max_bytes=1 << 30,
+                 instrumentation=None):
+        """
+        Initialize the BatchConverter class.
+
+        :param output_dir: str, folder receiving <name>.pdf files and <name>/ image folders
+        :param font_path: str, path to the font file used by the Office converters
+        :param max_workers: int, number of worker processes (default: os.cpu_count())
+        :param options: dict, converter kind ('word', 'excel', 'ppt', 'pdf_images') -> keyword
+                        arguments for its conversion method, e.g. {'pdf_images': {'zoom_factor': 1.0}}
+        :param cache_dir: str, folder of a ConversionCache shared by the workers (default: no cache)
+        :param cache_max_bytes: int, size limit of the cache
+        :param instrumentation: Instrumentation, passed to every converter; it is copied into the
+                                worker processes, so use a log_path rather than a callback
+        """
+        self.output_dir = output_dir
+        self.font_path = font_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.options = options or {}
+        self.cache = ConversionCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.instrumentation = instrumentation
+
+    def plan_jobs(self, inputs):
+        """
+        Assign output paths and order jobs largest file first.
+
+        Files sharing a base name get a numeric suffix so their outputs do not collide.
+
+        :return: list of (input_path, output_path, converter kind)
+        """
+        jobs, used_names = [], set()
+        for input_path in inputs:
+            kind = converter_kind(input_path)
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            name, counter = stem, 1
+            while (name, kind == 'pdf_images') in used_names:
+                counter += 1
+                name = f"{stem}_{counter}"
+            used_names.add((name, kind == 'pdf_images'))
+            if kind == 'pdf_images':
+                # PDFToImageConverter creates <base folder>/<pdf name>/ itself
+                output_path = os.path.join(self.output_dir, name) if name != stem else self.output_dir
+            else:
+                output_path = os.path.join(self.output_dir, f"{name}.pdf")
+            jobs.append((input_path, output_path, kind))
+        jobs.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+        return jobs
+
+    def run(self, sources):
+        """
+        Convert every supported file found in sources.
+
+        :param sources: list of str, files, folders or manifest files (see collect_inputs)
+        :return: list of dict, one result per file with input, output, status
+                 ('ok', 'failed' or 'skipped'), bytes, seconds and error
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        inputs = collect_inputs(sources)
+        results = [{'input': path, 'output': None, 'status': 'skipped', 'bytes': 0, 'seconds': 0.0, 'cached': False,
+                    'error': 'Unsupported or missing file'}
+                   for path in inputs if not converter_kind(path) or not os.path.isfile(path)]
+        jobs = self.plan_jobs([path for path in inputs if converter_kind(path) and os.path.isfile(path)])
+
+        start = time.perf_counter()
+        keys = {}
+        if self.cache is not None and jobs:
+            # Hash the inputs once, in parallel (hashlib releases the GIL), and serve cache hits
+            # here, so a fully cached batch never starts the warm worker pool
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as hashers:
+                keys = dict(zip([input_path for input_path, _, _ in jobs], hashers.map(self._cache_key, jobs)))
+            jobs = [job for job in jobs if not self._fetch_cached(job, keys[job[0]], results)]
+        try:
+            self._run_jobs(jobs, keys, results)
+        finally:
+            self.log_report(results, time.perf_counter() - start)
+        return results
+
+    def _run_jobs(self, jobs, keys, results):
+        """
+        Convert jobs in the warm process pool, appending one result per job to results.
+
+        If a worker process dies (e.g. a native parser crashes or the OS kills it for memory) the
+        pool breaks and every unfinished job is retried in a fresh pool. When a round makes no
+        progress at all, the remaining jobs run one per process so that only the offending file
+        fails.
+
+        :param jobs: list of (input_path, output_path, converter kind) from plan_jobs
+        :param keys: dict, input path -> cache key (empty without a cache)
+        :param results: list of dict, receives the result of every job
+        """
+        isolate = False
+        while jobs:
+            broken = []
+            batches = [[job] for job in jobs] if isolate else [jobs]
+            for batch in batches:
+                kinds = {kind for _, _, kind in batch}
+                pool_size = 1 if isolate else min(self.max_workers, len(batch))
+                with ProcessPoolExecutor(max_workers=pool_size, initializer=_init_worker,
+                                         initargs=(self.font_path, kinds)) as executor:
+                    futures = {executor.submit(_run_job, input_path, output_path, self.font_path,
+                                               self.options.get(kind), self.cache, self.instrumentation,
+                                               keys.get(input_path)): (input_path, output_path, kind)
+                               for input_path, output_path, kind in batch}
+                    for future in as_completed(futures):
+                        input_path, output_path, kind = futures[future]
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool as e:
+                            if not isolate:
+                                broken.append(futures[future])
+                                continue
+                            result = {'input': input_path, 'output': output_path, 'status': 'failed',
+                                      'bytes': os.path.getsize(input_path), 'cached': False, 'seconds': 0.0,
+                                      'error': f"Worker process crashed: {e}"}
+                        results.append(result)
+                        cached = ", cached" if result['cached'] else ""
+                        logger.info(f"[{result['status']}] {result['input']} ({result['seconds']:.2f} s{cached})")
+
+            if isolate:
+                break
+            # Retry jobs lost to a crashed worker, largest first; isolate them once a round completes nothing
+            isolate = len(broken) == len(jobs)
+            jobs = [job for job in jobs if job in broken]
+
+    def _cache_key(self, job):
+        input_path, _, kind = job
+        return cache_key(self.cache, input_path, self.font_path, self.options.get(kind))
+
+    def _fetch_cached(self, job, key, results):
+        input_path, output_path, _ = job
+        start = time.perf_counter()
+        target = output_target(input_path, output_path)
+        if not self.cache.fetch(key, target):
+            return False
+        results.append({'input': input_path, 'output': target, 'status': 'ok', 'bytes': os.path.getsize(input_path),
+                        'cached': True, 'seconds': time.perf_counter() - start})
+        logger.info(f"[ok] {input_path} (cached)")
+        return True
+
+    def log_report(self, results, elapsed):
+        # Per-file status followed by overall throughput
+        logger.info(f"\n{'status':<8} {'seconds':>8} {'MB':>8}  file")
+        for result in sorted(results, key=lambda result: result['input']):
+            logger.info(f"{result['status']:<8} {result['seconds']:>8.2f} {result['bytes'] / 1e6:>8.2f}  {result['input']}")
+            if result.get('error'):
+                logger.error(f"{'':<8} {result['error']}")
+
+        converted = [result for result in results if result['status'] == 'ok']
+        total_mb = sum(result['bytes'] for result in converted) / 1e6
+        cached = sum(result['cached'] for result in converted)
+        logger.info(f"\n{len(converted)} of {len(results)} file(s) converted in {elapsed:.2f} s ({cached} from cache)")
+        if elapsed > 0:
+            logger.info(f"Throughput: {len(converted) / elapsed:.2f} files/s, {total_mb / elapsed:.2f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a batch of .docx/.xlsx/.pptx/.pdf files.")
+    parser.add_argument('sources', nargs='+', help="files, folders or manifest files (.txt/.lst)")
+    parser.add_argument('-o', '--output-dir', required=True, help="output folder")
+    parser.add_argument('-f', '--font', required=True, help="TTF font for the Office converters")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--options', type=json.loads, default=None,
+                        help='JSON object of per-kind options, e.g. \'{"pdf_images": {"zoom_factor": 1.0}}\'')
+    parser.add_argument('--cache-dir', default=None, help="reuse outputs of earlier conversions stored in this folder")
+    parser.add_argument('--cache-size-mb', type=int, default=1024, help="size limit of the cache (default: 1024)")
+    parser.add_argument('--metrics-log', default=None, help="append per-stage timings and counts to this JSON-lines file")
+    parser.add_argument('--profile-dir', default=None, help="write a cProfile capture of every conversion to this folder")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    instrumentation = None
+    if args.metrics_log or args.profile_dir:
+        instrumentation = Instrumentation(log_path=args.metrics_log, profile_dir=args.profile_dir)
+    results = BatchConverter(args.output_dir, args.font, args.workers, args.options,
+                             args.cache_dir, args.cache_size_mb * 1024 * 1024, instrumentation).run(args.sources)
+    return 0 if all(result['status'] == 'ok' for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Command line interface: office-pdf-converter <command> [options]
+
+    word, excel, ppt   convert one Office file to PDF
+    pdf2img            render the pages of a PDF file to images
+    batch              convert folders/manifests of mixed files (batch_converter)
+    serve              run the local HTTP conversion service (conversion_service)
+    fi                 convert data_fi text files to JSON, JSON Lines or an SQLite index
+    gazette            extract fields from gazette XML files, folders or archives (gazette_extractor)
+
+Each command imports only the modules of its own backend, so e.g. pdf2img starts without
+loading reportlab, xhtml2pdf or the Office parsers.
+"""
+
+import argparse
+import importlib
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Commands parsed by the main() of their own module: command -> (module, help)
+_DELEGATED_COMMANDS = {
+    'batch': ('batch_converter', "convert folders or manifests of mixed files in a process pool"),
+    'serve': ('conversion_service', "run the local HTTP conversion service"),
+    'gazette': ('gazette_extractor', "extract fields from gazette XML files, folders or tar/zip archives"),
+}
+
+
+def _instrumentation(args):
+    if not args.metrics_log:
+        return None
+    from .instrumentation import Instrumentation
+    return Instrumentation(log_path=args.metrics_log)
+
+
+def _convert_cached(args, kind, output_path, options):
+    # Convert through batch_converter.convert_file, reusing the output of an identical earlier run
+    from .batch_converter import convert_file, converter_kind
+    from .conversion_cache import ConversionCache
+    if converter_kind(args.input) != kind:
+        logger.error(f"--cache-dir: {args.input} does not have a {args.command} file extension")
+        return 1
+    cache = ConversionCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+    try:
+        produced, cached = convert_file(args.input, output_path, getattr(args, 'font', None), options, cache,
+                                        _instrumentation(args))
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 1
+    if cached:
+        logger.info(f"Copied from the cache: {produced}")
+    return 0
+
+
+def _convert_word(args):
+    if args.cache_dir:
+        return _convert_cached(args, 'word', args.output, {'chunk_chars': args.chunk_chars, 'max_workers': args.workers})
+    from .word_to_pdf_converter import WordToPDFConverter
+    converter = WordToPDFConverter(args.input, args.output, args.font, instrumentation=_instrumentation(args))
+    errors = converter.convert_word_to_pdf(chunk_chars=args.chunk_chars, max_workers=args.workers)
+    return 1 if errors else 0
+
+
+def _convert_excel(args):
+    if args.cache_dir:
+        options = {'all_sheets': True, 'max_workers': args.workers} if args.all_sheets else {'streaming': args.streaming}
+        return _convert_cached(args, 'excel', args.output, options)
+    from .excel_to_pdf_converter import ExcelToPDFConverter
+    converter = ExcelToPDFConverter(args.font, instrumentation=_instrumentation(args))
+    if args.all_sheets:
+        converter.convert_workbook_to_pdf(args.input, args.output, max_workers=args.workers)
+    else:
+        converter.convert_excel_to_pdf(args.input, args.output, streaming=args.streaming)
+    return 0
+
+
+def _convert_ppt(args):
+    if args.cache_dir:
+        options = {'chunk_size': args.chunk_size, 'max_workers': args.workers, 'engine': args.engine}
+        return _convert_cached(args, 'ppt', args.output, options)
+    from .ppt_to_pdf_converter import PPTToPDFConverter
+    converter = PPTToPDFConverter(args.input, args.output, args.font, instrumentation=_instrumentation(args))
+    errors = converter.convert_ppt_to_pdf(chunk_size=args.chunk_size, max_workers=args.workers, engine=args.engine)
+    return 1 if errors else 0
+
+
+def _convert_pdf_to_images(args):
+    if args.cache_dir:
+        options = {'zoom_factor': args.zoom, 'workers': args.workers, 'image_format': args.format,
+                   'quality': args.quality, 'grayscale': args.grayscale, 'alpha': args.alpha, 'resume': args.resume}
+        return _convert_cached(args, 'pdf_images', args.output_dir, options)
+    from .pdf_to_Image_converter import PDFToImageConverter
+    converter = PDFToImageConverter(args.input, args.output_dir, instrumentation=_instrumentation(args))
+    errors = converter.convert_pdf_to_images(zoom_factor=args.zoom, workers=args.workers, image_format=args.format,
+                                             quality=args.quality, grayscale=args.grayscale, alpha=args.alpha,
+                                             resume=args.resume)
+    return 1 if errors else 0
+
+
+def _convert_fi(args):
+    from . import fi_codetransfer
+    if args.format == 'sqlite':
+        fi_codetransfer.build_index(args.input_dir, args.output)
+    elif args.format == 'json':
+        fi_codetransfer.process_files(args.input_dir, args.output)
+    else:
+        output_format = 'json' if args.format == 'compact-json' else 'jsonl'
+        fi_codetransfer.process_files_streaming(args.input_dir, args.output, output_format, args.workers)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='office-pdf-converter', description="Convert Office files to PDF and PDF pages to images.")
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    def add_conversion(name, help_text, handler, needs_font=True):
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        command.set_defaults(handler=handler)
+        command.add_argument('input', help="input file")
+        if needs_font:
+            command.add_argument('output', help="output PDF file")
+            command.add_argument('-f', '--font', required=True, help="TTF font used in the PDF (e.g. ipaexg.ttf)")
+        command.add_argument('--metrics-log', default=None, help="append per-stage timings and counts to this JSON-lines file")
+        command.add_argument('--cache-dir', default=None, help="reuse the output of an identical earlier conversion stored in this folder")
+        command.add_argument('--cache-size-mb', type=int, default=1024, help="size limit of the cache (default: 1024)")
+        return command
+
+    word = add_conversion('word', "convert a .docx file to PDF", _convert_word)
+    word.add_argument('--chunk-chars', type=int, default=None, help="render in section chunks of about this many HTML characters")
+    word.add_argument('-j', '--workers', type=int, default=1, help="processes rendering chunks in parallel")
+
+    excel = add_conversion('excel', "convert an .xlsx file to PDF", _convert_excel)
+    excel.add_argument('--all-sheets', action='store_true', help="convert every worksheet (default: the active one)")
+    excel.add_argument('--streaming', action='store_true', help="stream rows from a read-only workbook (active sheet only)")
+    excel.add_argument('-j', '--workers', type=int, default=None, help="processes rendering sheets in parallel (--all-sheets)")
+
+    ppt = add_conversion('ppt', "convert a .pptx file to PDF", _convert_ppt)
+    ppt.add_argument('--engine', choices=('html', 'reportlab'), default='html', help="slide layout engine")
+    ppt.add_argument('--chunk-size', type=int, default=None, help="slides per xhtml2pdf run (html engine)")
+    ppt.add_argument('-j', '--workers', type=int, default=1, help="processes rendering chunks in parallel")
+
+    pdf2img = add_conversion('pdf2img', "render the pages of a PDF file to images", _convert_pdf_to_images, needs_font=False)
+    pdf2img.add_argument('-o', '--output-dir', required=True, help="base folder; images go to <output-dir>/<pdf name>/")
+    pdf2img.add_argument('--zoom', type=float, default=2.0, help="scaling factor (default: 2.0)")
+    pdf2img.add_argument('--format', choices=('png', 'jpeg', 'webp'), default='png')
+    pdf2img.add_argument('--quality', type=int, default=90, help="JPEG/WebP quality (default: 90)")
+    pdf2img.add_argument('--grayscale', action='store_true')
+    pdf2img.add_argument('--alpha', action='store_true', help="keep a transparent background (PNG/WebP)")
+    pdf2img.add_argument('--resume', action='store_true', help="skip pages rendered by an earlier run")
+    pdf2img.add_argument('-j', '--workers', type=int, default=1, help="processes rendering pages in parallel")
+
+    fi = commands.add_parser('fi', help="convert data_fi text files", description="Convert data_fi text files.")
+    fi.set_defaults(handler=_convert_fi)
+    fi.add_argument('input_dir', help="data_fi folder")
+    fi.add_argument('output', help="output file")
+    fi.add_argument('--format', choices=('json', 'jsonl', 'compact-json', 'sqlite'), default='jsonl',
+                    help="indented JSON (in memory), JSON Lines or compact JSON (streamed), or an SQLite index")
+    fi.add_argument('-j', '--workers', type=int, default=None, help="processes parsing files (jsonl/compact-json)")
+
+    for name, (_, help_text) in _DELEGATED_COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in _DELEGATED_COMMANDS:
+        module = importlib.import_module('.' + _DELEGATED_COMMANDS[argv[0]][0], __package__)
+        return module.main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
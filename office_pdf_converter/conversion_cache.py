@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed on-disk cache for conversion outputs.
+
+Entries are keyed by the SHA-256 of the input bytes together with the converter kind, the
+font file contents and the conversion options, so a forwarded copy of an attachment hits
+the same entry whatever its file name. Each entry is a folder holding either output.pdf or
+an images/ folder; its mtime records the last use and the least recently used entries are
+evicted once the cache grows past its size limit. Only the standard library is imported
+here, so a cache hit never loads the converter stacks.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# Bump when a converter change makes earlier cached outputs stale
+CACHE_VERSION = 1
+
+# Files written by the converters that must not be replayed from the cache
+_IGNORED_FILES = ('.render_manifest.json',)
+
+# (abspath, size, mtime_ns) -> sha256, so a large font file is hashed once per process
+_file_digests = {}
+_file_digests_lock = threading.Lock()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    :param path: str, path to the file
+    :return: str, hex SHA-256 of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cached_file_sha256(path):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _file_digests_lock:
+        if key in _file_digests:
+            return _file_digests[key]
+    digest = file_sha256(path)
+    with _file_digests_lock:
+        _file_digests[key] = digest
+    return digest
+
+
+def _tree_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            try:
+                total += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total
+
+
+class ConversionCache:
+    PDF_NAME = 'output.pdf'
+    IMAGES_NAME = 'images'
+
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        """
+        Initialize the ConversionCache class.
+
+        :param cache_dir: str, folder holding the cache entries (created if missing)
+        :param max_bytes: int, total size the cache is trimmed back to after each store
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, input_path, kind, font_path=None, options=None):
+        """
+        Build the cache key of a conversion.
+
+        :param input_path: str, path to the input file
+        :param kind: str, converter kind ('word', 'excel', 'ppt', 'pdf_images')
+        :param font_path: str, font file used by the converter, hashed by contents
+        :param options: dict, conversion options; any change gives a different key
+        :return: str, hex SHA-256 key
+        """
+        digest = hashlib.sha256()
+        header = {
+            'version': CACHE_VERSION,
+            'kind': kind,
+            'font': _cached_file_sha256(font_path) if font_path else None,
+            'options': options or {},
+        }
+        digest.update(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(file_sha256(input_path).encode('ascii'))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, key, output_path):
+        """
+        Copy a cached output to output_path.
+
+        :param key: str, cache key from key()
+        :param output_path: str, destination PDF path, or destination folder for images (an
+                            existing folder is replaced)
+        :return: bool, True on a cache hit
+        """
+        entry_dir = self._entry_dir(key)
+        pdf_path = os.path.join(entry_dir, self.PDF_NAME)
+        images_path = os.path.join(entry_dir, self.IMAGES_NAME)
+        try:
+            if os.path.isfile(pdf_path):
+                os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+                shutil.copyfile(pdf_path, output_path)
+            elif os.path.isdir(images_path):
+                # Replace the folder, so pages left by an earlier, longer render do not linger
+                if os.path.isdir(output_path):
+                    shutil.rmtree(output_path)
+                shutil.copytree(images_path, output_path)
+            else:
+                return False
+            # Mark the entry as recently used
+            os.utime(entry_dir)
+        except OSError:
+            # Evicted by another process while copying
+            return False
+        return True
+
+    def store(self, key, produced_path):
+        """
+        Add a converter output to the cache and evict old entries if over the size limit.
+
+        :param key: str, cache key from key()
+        :param produced_path: str, PDF file or image folder written by the converter
+        """
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            os.utime(entry_dir)
+            return
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+
+        # Build the entry in a temporary folder and rename it, so readers never see a partial entry
+        temp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            if os.path.isdir(produced_path):
+                shutil.copytree(produced_path, os.path.join(temp_dir, self.IMAGES_NAME),
+                                ignore=shutil.ignore_patterns(*_IGNORED_FILES))
+            else:
+                shutil.copyfile(produced_path, os.path.join(temp_dir, self.PDF_NAME))
+            os.replace(temp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        :return: int, number of entries removed
+        """
+        entries = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if prefix.startswith('.') or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                try:
+                    entries.append((os.path.getmtime(entry_dir), _tree_size(entry_dir), entry_dir))
+                except OSError:
+                    pass
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Local HTTP conversion service.
+
+    POST /convert?filename=report.docx   body: file bytes  -> 202 {"job_id": ...}, 429 when the queue is full
+    GET  /jobs/<job_id>                                    -> job status
+    GET  /jobs/<job_id>/result                             -> PDF, or a zip of the page images for PDF input
+    GET  /health                                           -> queue and worker counts
+
+Jobs wait in a bounded queue and run in worker processes, one per slot. Every job has a
+wall-clock limit and every worker an address-space limit (RLIMIT_AS); a worker that runs
+past the limit, hits a MemoryError or dies is replaced, and its job is reported as failed,
+so one pathological file cannot hang the service.
+"""
+
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .batch_converter import CONVERTER_KINDS, converter_kind, convert_file, _init_worker
+from .conversion_cache import ConversionCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limit
+    resource = None
+
+
+def _worker_main(conn, font_path, kinds, memory_limit, options, cache):
+    # Runs in the worker process: apply the memory limit, warm up, then convert jobs until told to stop
+    if resource is not None and memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    _init_worker(font_path, kinds)
+    conn.send('ready')
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        input_path, output_path = job
+        # Replies are (status, output, error, restart); restart asks the slot for a fresh worker
+        try:
+            output, cached = convert_file(input_path, output_path, font_path, options.get(converter_kind(input_path)), cache)
+            conn.send(('done', output, None, False))
+        except MemoryError:
+            # The heap may be left fragmented close to the limit: exit rather than take the next job
+            conn.send(('failed', None, "MemoryError: memory limit exceeded; worker restarted", True))
+            break
+        except Exception as e:
+            conn.send(('failed', None, f"{type(e).__name__}: {e}", False))
+
+
+class _WorkerProcess:
+    def __init__(self, context, service):
+        # Start one worker process connected by a pipe
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, service.font_path, set(CONVERTER_KINDS.values()), service.memory_limit,
+                  service.options, service.cache),
+            daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Wait for the imports and font registration, so they do not count against the first job's timeout
+        try:
+            ready = self.conn.poll(120) and self.conn.recv() == 'ready'
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            self.kill()
+            raise RuntimeError(f"Worker process failed to start (exit code {self.process.exitcode})")
+
+    def kill(self):
+        # Stop the process without waiting for the job it is running
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self):
+        # Ask an idle worker to exit, killing it if it does not
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ConversionService:
+    def __init__(self, font_path, work_dir=None, workers=2, queue_size=8, job_timeout=300, memory_limit_mb=2048,
+                 max_upload_mb=100, result_ttl=3600, options=None, cache_dir=None):
+        """
+        Initialize the ConversionService class.
+
+        :param font_path: str, path to the font file used by the Office converters
+        :param work_dir: str, folder for uploaded files and results (default: a temporary folder)
+        :param workers: int, number of worker processes
+        :param queue_size: int, number of jobs that may wait for a worker before submissions get 429
+        :param job_timeout: float, seconds a job may run before its worker is killed and replaced
+        :param memory_limit_mb: int, address-space limit of each worker process (0 for none; POSIX only)
+        :param max_upload_mb: int, largest accepted upload
+        :param result_ttl: float, seconds finished jobs and their files are kept
+        :param options: dict, converter kind -> keyword arguments for its conversion method
+        :param cache_dir: str, folder of a ConversionCache shared by the workers (optional)
+        """
+        self.font_path = font_path
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='conversion_service_')
+        self.workers = workers
+        self.job_timeout = job_timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.result_ttl = result_ttl
+        self.options = options or {}
+        self.cache = ConversionCache(cache_dir) if cache_dir else None
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._slots = []
+        self._httpd = None
+        # Spawn rather than fork: the parent runs HTTP and supervisor threads
+        self._context = multiprocessing.get_context('spawn')
+
+    def start(self, host='127.0.0.1', port=8000):
+        """
+        Start the worker slots and the HTTP server in background threads.
+
+        :param port: int, TCP port (0 picks a free port; see server_address)
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        for _ in range(self.workers):
+            slot = threading.Thread(target=self._run_slot, daemon=True)
+            slot.start()
+            self._slots.append(slot)
+        self._httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._httpd.service = self
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        logger.info(f"Conversion service listening on http://{self.server_address[0]}:{self.server_address[1]}")
+
+    @property
+    def server_address(self):
+        return self._httpd.server_address
+
+    def shutdown(self):
+        # Stop accepting requests, then let every slot stop its worker
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        self._stopping.set()
+        for slot in self._slots:
+            slot.join()
+        self._slots = []
+
+    def submit(self, filename, data):
+        """
+        Queue a conversion job.
+
+        :param filename: str, original file name; its extension selects the converter
+        :param data: bytes, file contents
+        :return: str, job id
+        :raises ValueError: if the file type is not supported
+        :raises queue.Full: if the queue is full
+        """
+        kind = converter_kind(filename)
+        if kind is None:
+            raise ValueError(f"Unsupported file type: {filename}")
+        self._expire_jobs()
+
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.work_dir, job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, os.path.basename(filename))
+        with open(input_path, 'wb') as f:
+            f.write(data)
+        output_path = job_dir if kind == 'pdf_images' else os.path.join(job_dir, 'output.pdf')
+        job = {'id': job_id, 'filename': filename, 'kind': kind, 'status': 'queued', 'submitted': time.time(),
+               'input_path': input_path, 'output_path': output_path}
+        with self.jobs_lock:
+            self.jobs[job_id] = job
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            with self.jobs_lock:
+                del self.jobs[job_id]
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job_id
+
+    def job_status(self, job_id):
+        """
+        :return: dict, public fields of the job, or None if unknown
+        """
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: job[key] for key in ('id', 'filename', 'kind', 'status', 'submitted', 'started', 'finished',
+                                              'seconds', 'error') if key in job}
+
+    def job_output(self, job_id):
+        """
+        :return: (str, str), status of the job and its output path (None unless done),
+                 or (None, None) if the job is unknown or has expired
+        """
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None, None
+            return job['status'], job.get('output')
+
+    def _expire_jobs(self):
+        # Drop finished jobs older than result_ttl together with their files
+        cutoff = time.time() - self.result_ttl
+        with self.jobs_lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job.get('finished', float('inf')) < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
+        for job_id in expired:
+            shutil.rmtree(os.path.join(self.work_dir, job_id), ignore_errors=True)
+
+    def _finish(self, job, status, output=None, error=None):
+        with self.jobs_lock:
+            job['status'] = status
+            job['finished'] = time.time()
+            job['seconds'] = job['finished'] - job['started']
+            job['output'] = output
+            if error:
+                job['error'] = error
+        logger.log(logging.INFO if status == 'done' else logging.ERROR, f"[{status}] {job['filename']} ({job['seconds']:.2f} s){': ' + error if error else ''}")
+
+    def _run_slot(self):
+        # Feed queued jobs to one worker process, replacing it when it times out or dies
+        worker = None
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            with self.jobs_lock:
+                job['status'] = 'running'
+                job['started'] = time.time()
+            try:
+                if worker is None or not worker.process.is_alive():
+                    worker = None
+                    worker = _WorkerProcess(self._context, self)
+            except RuntimeError as e:
+                self._finish(job, 'failed', error=str(e))
+                continue
+            try:
+                worker.conn.send((job['input_path'], job['output_path']))
+                if not worker.conn.poll(self.job_timeout):
+                    worker.kill()
+                    worker = None
+                    self._finish(job, 'timeout', error=f"Conversion exceeded {self.job_timeout} s; worker restarted")
+                    continue
+                status, output, error, restart = worker.conn.recv()
+                if restart:
+                    worker.stop()
+                    worker = None
+                self._finish(job, status, output, error)
+            except (EOFError, OSError):
+                # The worker died mid-job (killed by the memory limit or a crash in native code)
+                exitcode = worker.process.exitcode
+                worker.kill()
+                worker = None
+                self._finish(job, 'failed', error=f"Worker process exited with code {exitcode}; worker restarted")
+        if worker is not None:
+            worker.stop()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            return self._send_json(404, {'error': 'Not found'})
+        filename = parse_qs(url.query).get('filename', [''])[0]
+        try:
+            length = int(self.headers['Content-Length'])
+        except (TypeError, ValueError):
+            length = -1
+        if length < 0:
+            return self._send_json(400, {'error': 'Missing or invalid Content-Length'})
+        if length > service.max_upload_bytes:
+            return self._send_json(413, {'error': 'Upload too large'})
+        data = self.rfile.read(length)
+        try:
+            job_id = service.submit(filename, data)
+        except ValueError as e:
+            return self._send_json(400, {'error': str(e)})
+        except queue.Full:
+            return self._send_json(429, {'error': 'Conversion queue is full, retry later'})
+        self._send_json(202, {'job_id': job_id, 'status_url': f'/jobs/{job_id}'})
+
+    def do_GET(self):
+        service = self.server.service
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if parts == ['health']:
+            return self._send_json(200, {'queued': service.queue.qsize(), 'workers': service.workers})
+        if len(parts) not in (2, 3) or parts[0] != 'jobs' or (len(parts) == 3 and parts[2] != 'result'):
+            return self._send_json(404, {'error': 'Not found'})
+        if len(parts) == 2:
+            status = service.job_status(parts[1])
+            if status is None:
+                return self._send_json(404, {'error': 'Unknown job'})
+            return self._send_json(200, status)
+        # Status and output are read together, so a job expiring in between cannot be half-seen
+        status, output = service.job_output(parts[1])
+        if status is None:
+            return self._send_json(404, {'error': 'Unknown job'})
+        if status != 'done':
+            return self._send_json(409, {'error': f"Job is {status}"})
+        self._send_result(output)
+
+    def _send_result(self, output):
+        try:
+            if os.path.isdir(output):
+                # Page images are returned as one zip archive
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+                    for filename in sorted(os.listdir(output)):
+                        if not filename.startswith('.'):
+                            archive.write(os.path.join(output, filename), filename)
+                body, content_type = buffer.getvalue(), 'application/zip'
+            else:
+                with open(output, 'rb') as f:
+                    body, content_type = f.read(), 'application/pdf'
+        except FileNotFoundError:
+            # Expired and removed while being read
+            return self._send_json(404, {'error': 'Unknown job'})
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the local conversion service.")
+    parser.add_argument('-f', '--font', required=True, help="TTF font for the Office converters")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-j', '--workers', type=int, default=2, help="number of worker processes")
+    parser.add_argument('--queue-size', type=int, default=8, help="waiting jobs before requests get 429")
+    parser.add_argument('--job-timeout', type=float, default=300, help="seconds per job before the worker is killed")
+    parser.add_argument('--memory-limit-mb', type=int, default=2048, help="address-space limit per worker (0: none)")
+    parser.add_argument('--work-dir', default=None, help="folder for uploads and results")
+    parser.add_argument('--cache-dir', default=None, help="reuse outputs of earlier conversions stored in this folder")
+    parser.add_argument('--options', type=json.loads, default=None, help="JSON object of per-kind options")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    service = ConversionService(args.font, args.work_dir, args.workers, args.queue_size, args.job_timeout,
+                                args.memory_limit_mb, options=args.options, cache_dir=args.cache_dir)
+    service.start(args.host, args.port)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
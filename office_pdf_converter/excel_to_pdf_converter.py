@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 24 21:49:42 2024
+
+@author: Ken
+"""
+
+import logging
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate, chain, islice
+from openpyxl import load_workbook
+from reportlab.lib.pagesizes import landscape, A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import simpleSplit
+from openpyxl.utils import get_column_letter
+from .font_registry import DEFAULT_FONT_NAME, register_font
+from .instrumentation import Instrumentation
+from .pdf_utils import merge_pdf_files
+
+logger = logging.getLogger(__name__)
+
+# convert_workbook_to_pdf renders in-process below this many cells in total ...
+PARALLEL_MIN_CELLS = 50000
+# ... or when the largest sheet holds at least this share of them
+PARALLEL_MAX_SHARE = 0.8
+# convert_excel_to_pdf_streaming writes finished pages to a part file every this many pages
+STREAMING_PAGES_PER_PART = 200
+
+class ExcelToPDFConverter:
+    def __init__(self, font_path, font_name=DEFAULT_FONT_NAME, measure_cache_size=65536, instrumentation=None):
+        # Initialize by registering the Japanese font; instrumentation receives stage timings and counts
+        self.font_path = font_path
+        self.font_name = font_name
+        self.instrumentation = instrumentation or Instrumentation()
+        self.register_japanese_font(font_path)
+        # Memoized line wrapping keyed on (text, font, size, width), shared by the height and draw passes
+        self.split_text = lru_cache(maxsize=measure_cache_size)(simpleSplit)
+
+    def register_japanese_font(self, font_path):
+        # Register custom Japanese font for use in PDF (parsed once per process)
+        register_font(font_path, self.font_name)
+
+    def measure_cache_info(self):
+        # Hit/miss counters of the text measurement cache
+        info = self.split_text.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize}
+
+    def is_border_color_empty(self, color):
+        # Check if border color is empty (transparent or white).
+        return color is None or (color.type in ['', 'rgb'] and color.rgb.upper() == 'FFFFFF')
+
+    def draw_cell_border(self, c, x, y, width, height):
+        # Draw boundary box for cell at given position
+        c.setStrokeColorRGB(0, 0, 0)
+        c.rect(x, y, width, height, stroke=1, fill=0)
+
+    def is_data_table(self, ws):
+        # Determine if worksheet is a complete data table (over 90% cells have data)
+        total_cells = ws.max_row * ws.max_column
+        non_empty_cells = sum(1 for row in ws.iter_rows() for cell in row if cell.value is not None)
+        return (non_empty_cells / total_cells) >= 0.90 if total_cells > 0 else False
+
+    def format_cell_value(self, cell_value):
+        # Format cell value: floating-point numbers retain two decimals
+        if isinstance(cell_value, float):
+            return f"{cell_value:.2f}"
+        return str(cell_value)
+
+    def calculate_max_chars(self, cell_width, font_size):
+        # Calculate maximum characters in a cell given its width and font size
+        char_width = font_size
+        return int(cell_width * 1.03 / char_width)
+
+    def adjust_column_widths(self, ws, pdf_width, left_margin, right_margin):
+        # Adjust PDF column widths based on Excel column widths
+        excel_col_widths = [(ws.column_dimensions[get_column_letter(col)].width or 10) for col in range(1, ws.max_column + 1)]
+        total_excel_width = sum(excel_col_widths)
+        return [(pdf_width - left_margin - right_margin) * (width / total_excel_width) for width in excel_col_widths]
+
+    def build_sheet_layout(self, ws, pdf_width, left_margin, right_margin):
+        # Build per-sheet layout tables (column widths, offsets, merge spans) once before rendering
+        col_widths = self.adjust_column_widths(ws, pdf_width, left_margin, right_margin)
+        return SheetLayout(col_widths, ws.merged_cells.ranges)
+
+    def is_data_table_sample(self, rows, max_column):
+        # Estimate is_data_table from a sample of rows (used when the sheet is streamed)
+        total_cells = len(rows) * max_column
+        non_empty_cells = sum(1 for row in rows for cell in row if cell.value is not None)
+        return (non_empty_cells / total_cells) >= 0.90 if total_cells > 0 else False
+
+    def convert_excel_to_pdf(self, excel_file, pdf_file, streaming=False, sample_rows=1000):
+        """
+        Convert the active worksheet of an Excel file to PDF.
+
+        :param excel_file: str, path to the input Excel file
+        :param pdf_file: str, path to the output PDF file
+        :param streaming: bool, read the sheet with openpyxl's read-only row iteration so that
+                          memory stays flat regardless of the number of rows (see convert_excel_to_pdf_streaming)
+        :param sample_rows: int, number of leading rows used to decide the table layout in streaming mode
+        """
+        if streaming:
+            self.convert_excel_to_pdf_streaming(excel_file, pdf_file, sample_rows)
+            return
+
+        with self.instrumentation.run('excel', input=excel_file, output=pdf_file):
+            with self.instrumentation.stage('load', bytes=os.path.getsize(excel_file)):
+                wb = load_workbook(excel_file, data_only=True)
+            self.convert_sheet_to_pdf(wb.active, pdf_file)
+        
+        logger.info("Conversion complete: {} to {}".format(excel_file, pdf_file))  # Notification of completion
+
+    def convert_sheet_to_pdf(self, ws, pdf_file):
+        # Render one loaded worksheet to its own PDF file
+        with self.instrumentation.stage('layout', sheet=ws.title):
+            table_flag = self.is_data_table(ws)
+            width, _ = landscape(A4)
+            layout = self.build_sheet_layout(ws, width, 50, 50)
+
+        with self.instrumentation.stage('render', sheet=ws.title) as stage:
+            c = canvas.Canvas(pdf_file, pagesize=landscape(A4))
+            rows = ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column)
+            self._render_and_save(c, rows, layout, table_flag, pdf_file, stage)
+
+    def _render_and_save(self, c, rows, layout, table_flag, pdf_file, stage):
+        # Draw and save the canvas, recording rows, pages and bytes on the stage and run counters
+        row_count = self.render_rows(c, rows, layout, table_flag)
+        # Close the last page explicitly: an empty sheet then still gets one blank page,
+        # whereas save() alone writes a PDF without pages, which cannot be merged
+        c.showPage()
+        page_count = c.getPageNumber() - 1
+        c.save()
+        stage.update(rows=row_count, pages=page_count, bytes=os.path.getsize(pdf_file),
+                     measure_cache=self.measure_cache_info())
+        self.instrumentation.count('sheets')
+        self.instrumentation.count('rows', row_count)
+        self.instrumentation.count('pages', page_count)
+
+    def convert_workbook_to_pdf(self, excel_file, pdf_file, sheet_names=None, max_workers=None):
+        """
+        Convert several worksheets of an Excel file into one PDF, one sheet after another.
+
+        Sheets are laid out and drawn independently in a process pool (largest first, so the
+        biggest sheet does not start last), each into its own temporary PDF, and the parts are
+        merged in workbook order at the end.
+
+        Every worker parses the whole workbook once: openpyxl loads a single sheet only in
+        read-only mode, which lacks the column widths and merged ranges the layout needs. A
+        pool therefore costs one parsed workbook of memory per worker and finishes after a full
+        parse plus the largest sheet. It is only used where that pays off: with at least
+        PARALLEL_MIN_CELLS cells, when no sheet holds PARALLEL_MAX_SHARE of them, and with no
+        more workers than it takes to make the largest sheet the critical path.
+
+        :param excel_file: str, path to the input Excel file
+        :param pdf_file: str, path to the output PDF file
+        :param sheet_names: list of str, worksheets to convert (default: all worksheets)
+        :param max_workers: int, upper bound on the worker processes (default: os.cpu_count();
+                            1 renders in-process)
+        """
+        with self.instrumentation.run('excel', input=excel_file, output=pdf_file):
+            self._convert_workbook_to_pdf(excel_file, pdf_file, sheet_names, max_workers)
+
+    def _convert_workbook_to_pdf(self, excel_file, pdf_file, sheet_names, max_workers):
+        # Read-only load only reads the sheet list and dimension records
+        wb = load_workbook(excel_file, read_only=True)
+        try:
+            all_sheets = wb.sheetnames
+            if sheet_names is None:
+                sheet_names = all_sheets
+            missing = [name for name in sheet_names if name not in all_sheets]
+            if missing:
+                raise ValueError(f"Worksheets not found in {excel_file}: {missing}")
+            sheet_sizes = {name: (wb[name].max_row or 0) * (wb[name].max_column or 0) for name in sheet_names}
+        finally:
+            wb.close()
+
+        max_workers = min(max_workers or os.cpu_count() or 1, len(sheet_names)) or 1
+        total_cells = sum(sheet_sizes.values())
+        largest = max(sheet_sizes.values(), default=0)
+        if total_cells < PARALLEL_MIN_CELLS or largest >= PARALLEL_MAX_SHARE * total_cells:
+            max_workers = 1
+        else:
+            max_workers = min(max_workers, math.ceil(total_cells / largest))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            part_files = [os.path.join(temp_dir, f"sheet_{index}.pdf") for index in range(len(sheet_names))]
+            jobs = sorted(zip(sheet_names, part_files), key=lambda job: sheet_sizes[job[0]], reverse=True)
+
+            if max_workers == 1:
+                with self.instrumentation.stage('load', bytes=os.path.getsize(excel_file)):
+                    wb = load_workbook(excel_file, data_only=True)
+                for sheet_name, part_file in jobs:
+                    self.convert_sheet_to_pdf(wb[sheet_name], part_file)
+            else:
+                with self.instrumentation.stage('render', sheets=len(jobs), workers=max_workers):
+                    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sheet_worker,
+                                             initargs=(self.font_path, self.font_name, excel_file)) as executor:
+                        futures = [executor.submit(_render_sheet, sheet_name, part_file) for sheet_name, part_file in jobs]
+                        for future in futures:
+                            future.result()
+                self.instrumentation.count('sheets', len(jobs))
+
+            with self.instrumentation.stage('merge', parts=len(part_files)):
+                merge_pdf_files(part_files, pdf_file)
+
+        logger.info("Conversion complete: {} ({} sheets) to {}".format(excel_file, len(sheet_names), pdf_file))
+
+    def convert_excel_to_pdf_streaming(self, excel_file, pdf_file, sample_rows=1000):
+        """
+        Convert the active worksheet to PDF while streaming rows from a read-only workbook.
+
+        Rows are read once and drawn as they arrive, and at most sample_rows rows are held in
+        memory (to decide the table/free-form layout). Finished pages are written to a part file
+        every STREAMING_PAGES_PER_PART pages and the parts are merged at the end, since a single
+        ReportLab canvas would keep every page in memory until it is saved. Read-only worksheets expose neither column widths nor merged
+        ranges, so columns share the page width evenly and merged cells are drawn unmerged.
+
+        :param excel_file: str, path to the input Excel file
+        :param pdf_file: str, path to the output PDF file
+        :param sample_rows: int, number of leading rows used to decide the table layout
+        """
+        with self.instrumentation.run('excel', input=excel_file, output=pdf_file, streaming=True):
+            wb = load_workbook(excel_file, read_only=True, data_only=True)
+            try:
+                with self.instrumentation.stage('load', bytes=os.path.getsize(excel_file)):
+                    ws = wb.active
+                    if not ws.max_column or not ws.max_row:
+                        # No dimension record in the file: one extra streaming pass to size the sheet
+                        ws.calculate_dimension(force=True)
+                    max_column = ws.max_column or 0
+
+                    rows = ws.iter_rows(min_row=1, min_col=1, max_col=max_column)
+                    sample = list(islice(rows, sample_rows))
+                    table_flag = self.is_data_table_sample(sample, max_column)
+
+                # Reading the remaining rows is part of this stage, since they are streamed while drawing
+                with self.instrumentation.stage('render', sheet=ws.title) as stage, \
+                        tempfile.TemporaryDirectory() as part_dir:
+                    c = PartedCanvas(pdf_file, part_dir, STREAMING_PAGES_PER_PART, pagesize=landscape(A4))
+                    width, _ = landscape(A4)
+                    col_widths = [(width - 50 - 50) / max_column] * max_column if max_column else []
+                    layout = SheetLayout(col_widths)
+                    self._render_and_save(c, chain(sample, rows), layout, table_flag, pdf_file, stage)
+            finally:
+                wb.close()
+
+        logger.info("Conversion complete: {} to {}".format(excel_file, pdf_file))  # Notification of completion
+
+    def render_rows(self, c, rows, layout, table_flag):
+        # Draw worksheet rows onto the canvas, starting new pages as they fill up; returns the number of rows read
+        row_number = 0
+        width, height = landscape(A4)
+        left_margin, top_margin = 50, 40
+        x_offset, y_offset = left_margin, height - top_margin
+        base_row_height = 24
+        col_widths = layout.col_widths
+        y_current = y_offset
+
+        for row_number, row in enumerate(rows, start=1):
+            cell_heights, row_has_data = [], False
+            formatted_values = {}
+
+            for j, cell in enumerate(row):
+                if cell.value is None:
+                    continue
+                row_has_data = True
+
+                cell_merge_width = layout.cell_width(row_number, j + 1)
+                formatted_value = self.format_cell_value(cell.value)
+                formatted_values[j] = formatted_value
+                lines = self.split_text(formatted_value, self.font_name, 12, cell_merge_width)
+                line_count = len(lines)
+                cell_height = base_row_height * line_count
+                cell_heights.append(cell_height)
+
+            if not row_has_data:
+                continue
+
+            row_height = max(cell_heights) if cell_heights else base_row_height
+
+            if y_current - row_height < top_margin:
+                c.showPage()
+                y_current = y_offset
+
+            if table_flag:
+                for j, cell in enumerate(row):
+                    if cell.value is None:
+                        continue
+
+                    merge_width = layout.cell_width(row_number, j + 1)
+                    top_left_x = x_offset + layout.col_offsets[j]
+                    top_left_y = y_current
+                    
+                    self.draw_cell_border(c, top_left_x, top_left_y - row_height, merge_width, row_height)
+
+                    font_size = 12
+                    max_chars = self.calculate_max_chars(merge_width, font_size)
+
+                    formatted_value = formatted_values[j]
+                    
+                    if len(formatted_value) > max_chars:
+                        font_size = 10
+
+                    c.setFont(self.font_name, font_size)
+                    y_text_offset = top_left_y - 15
+                    lines = self.split_text(formatted_value, self.font_name, font_size, merge_width)
+                    for k, line in enumerate(lines):
+                        c.drawString(top_left_x + 2, y_text_offset - 12 * k, line)
+
+            else:
+                for j, cell in enumerate(row):
+                    if cell.value is None:
+                        continue
+
+                    merge_width = layout.cell_width(row_number, j + 1)
+                    text = formatted_values[j]
+
+                    font_size = 12
+                    max_chars = self.calculate_max_chars(merge_width, font_size)
+
+                    if len(text) > max_chars:
+                        needed_width = len(text) * font_size * 0.5
+                        remaining_width = merge_width
+                        for k in range(j+1, len(row)):
+                            if row[k].value is None:
+                                remaining_width += col_widths[k]
+                                if remaining_width >= needed_width:
+                                    break
+                            else:
+                                break
+
+                        if remaining_width >= needed_width:
+                            merge_width = remaining_width
+                            max_chars = self.calculate_max_chars(merge_width, font_size)
+
+                    top_left_x = x_offset + layout.col_offsets[j]
+                    top_left_y = y_current
+
+                    merge_width = min(merge_width, 61 * 12 * 12 / font_size)
+                    lines = text.split('\n')
+                    wrapped_lines = []
+
+                    max_chars = int(merge_width * 1.03 / font_size)
+
+                    for line in lines:
+                        wrapped_lines.extend([line[i:i+max_chars] for i in range(0, len(line), max_chars)])
+                    
+                    y_text_offset = top_left_y - 15
+                    for k, line in enumerate(wrapped_lines):
+                        c.setFont(self.font_name, font_size)
+                        c.drawString(top_left_x + 2, y_text_offset - 12 * k, line)
+
+            y_current -= row_height
+
+        return row_number
+
+
+class SheetLayout:
+    def __init__(self, col_widths, merged_ranges=()):
+        """
+        Precomputed layout tables for one worksheet.
+
+        Column offsets are prefix sums of the column widths, and merged ranges are indexed by
+        their top-left coordinate (the only cell of a merged range that carries a value), so
+        looking up a cell's x position or merged width costs O(1) instead of scanning every
+        merged range and re-summing column widths per cell.
+
+        :param col_widths: list of float, PDF width of each column
+        :param merged_ranges: iterable of openpyxl CellRange, merged ranges of the worksheet
+        """
+        self.col_widths = col_widths
+        self.col_offsets = list(accumulate(col_widths, initial=0))
+        self.merge_spans = {}
+        for merged_range in merged_ranges:
+            self.merge_spans[(merged_range.min_row, merged_range.min_col)] = (merged_range.min_col, merged_range.max_col)
+
+    def span_width(self, start_col, end_col):
+        # Total width of columns start_col..end_col (1-based, inclusive)
+        end_col = min(end_col, len(self.col_widths))
+        return self.col_offsets[end_col] - self.col_offsets[start_col - 1]
+
+    def cell_width(self, row, col):
+        # Width of the cell at (row, col), spanning all columns of its merged range if any
+        span = self.merge_spans.get((row, col))
+        if span is None:
+            return self.col_widths[col - 1]
+        return self.span_width(*span)
+
+
+class PartedCanvas:
+    def __init__(self, pdf_file, part_dir, pages_per_part, **canvas_options):
+        """
+        Stand-in for a ReportLab Canvas that writes its pages to part files as they fill up.
+
+        A Canvas keeps every finished page in memory until save(). This one starts a new
+        Canvas (in part_dir) every pages_per_part pages and saves the previous one, so at most
+        one part is held in memory; save() merges the parts into pdf_file. Drawing state is
+        not carried over to the next part, so callers must set the font and colors per page.
+
+        :param pdf_file: str, path to the output PDF file
+        :param part_dir: str, folder for the part files (e.g. a temporary directory)
+        :param pages_per_part: int, number of pages per part file
+        :param canvas_options: keyword arguments for canvas.Canvas (e.g. pagesize)
+        """
+        self.pdf_file = pdf_file
+        self.part_dir = part_dir
+        self.pages_per_part = pages_per_part
+        self.canvas_options = canvas_options
+        self.part_files = []
+        self.saved_pages = 0
+        self._canvas = None
+
+    def _current(self):
+        # The Canvas of the current part, started on first use so no part ends up without pages
+        if self._canvas is None:
+            part_file = os.path.join(self.part_dir, f"part_{len(self.part_files)}.pdf")
+            self.part_files.append(part_file)
+            self._canvas = canvas.Canvas(part_file, **self.canvas_options)
+        return self._canvas
+
+    def __getattr__(self, name):
+        # Drawing operations go to the current part
+        return getattr(self._current(), name)
+
+    def getPageNumber(self):
+        return self.saved_pages + (self._canvas.getPageNumber() if self._canvas else 1)
+
+    def showPage(self):
+        c = self._current()
+        c.showPage()
+        if c.getPageNumber() > self.pages_per_part:
+            c.save()
+            self.saved_pages += self.pages_per_part
+            self._canvas = None
+
+    def save(self):
+        if self._canvas is not None or not self.part_files:
+            self._current().save()
+            self._canvas = None
+        if len(self.part_files) == 1:
+            shutil.move(self.part_files[0], self.pdf_file)
+        else:
+            # Parts of one canvas share no objects (each embeds its own font subset), so
+            # searching them for duplicates would only cost time
+            merge_pdf_files(self.part_files, self.pdf_file, garbage=1)
+
+
+# Per-process state for convert_workbook_to_pdf workers: the converter (font registered once)
+# and the full workbook, loaded once per worker instead of once per sheet
+_sheet_worker = {}
+
+
+def _init_sheet_worker(font_path, font_name, excel_file):
+    _sheet_worker['converter'] = ExcelToPDFConverter(font_path, font_name)
+    _sheet_worker['workbook'] = load_workbook(excel_file, data_only=True)
+
+
+def _render_sheet(sheet_name, pdf_file):
+    _sheet_worker['converter'].convert_sheet_to_pdf(_sheet_worker['workbook'][sheet_name], pdf_file)
@@ -0,0 +1,178 @@
+import os
+import json
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+def parse_line(line, warn=True):
+    # 使用制表符拆分行
+    fields = line.strip().split('\t')
+    
+    # 检查字段数量是否足够（warn=False 时不逐行打印，由调用方统计）
+    if len(fields) < 2:
+        if warn:
+            logger.warning(f"Line skipped due to insufficient fields: {line}")
+        return None
+    
+    # 处理第一个字段，按照空格拆分
+    sub_fields = fields[0].split()
+    
+    # 提取 subclass 和 smallclass
+    subclass = sub_fields[0] if len(sub_fields) > 0 else ""
+    smallclass = sub_fields[1] if len(sub_fields) > 1 else ""
+    smallclass = smallclass.replace(":","/")
+    
+    # 处理 fi_code
+    fi_code = ""
+    if len(sub_fields) > 2:
+        fi_code = sub_fields[2]
+        if len(sub_fields) > 3 and sub_fields[3] != "\\":
+            fi_code += sub_fields[3]
+    
+    # 提取描述字段
+    ja_description = fields[-2] if len(fields) >= 2 else ""
+    en_description = fields[-1] if len(fields) >= 1 else ""
+    id = subclass+smallclass.replace("/","_")+fi_code.replace("\\","emptyfi")
+    
+    return {
+        "id": id,
+        "subclass": subclass,
+        "smallclass": smallclass,
+        "fi_code": fi_code,
+        "ja_description": ja_description,
+        "en_description": en_description
+    }
+
+def _iter_fi_files(input_directory):
+    # 遍历目录中的文件，返回文件名长度大于9的 .txt 文件路径
+    for root, dirs, files in os.walk(input_directory):
+        for filename in files:
+            file_path = os.path.join(root, filename)
+
+            # 检查是否为文件且文件名长度大于9
+            if os.path.isfile(file_path) and len(filename) > 9 and filename.endswith('.txt'):
+                yield file_path
+
+def process_files(input_directory, output_file):
+    data = []
+    total_lines = 0  # 总行数计数器
+    skipped_lines = 0  # 跳过的行数计数器
+
+    for file_path in _iter_fi_files(input_directory):
+        with open(file_path, 'r', encoding='EUC-JP') as file:
+            for line in file:
+                # 解析每行并添加到数据列表
+                parsed_data = parse_line(line)
+                if parsed_data:
+                    data.append(parsed_data)
+                    total_lines += 1
+                else:
+                    skipped_lines += 1
+
+    # 将数据写入 JSON 文件
+    with open(output_file, 'w', encoding='utf-8') as json_file:
+        json.dump(data, json_file, ensure_ascii=False, indent=4)
+
+    # 记录总共转换的行数和跳过的行数
+    logger.info(f"Total lines processed: {total_lines}")
+    logger.info(f"Total lines skipped: {skipped_lines}")
+
+def _iter_fi_records(input_directory):
+    # 逐行解析所有文件，逐条返回记录（不在内存中保留整个表）
+    for file_path in sorted(_iter_fi_files(input_directory)):
+        with open(file_path, 'r', encoding='EUC-JP') as file:
+            for line in file:
+                parsed_data = parse_line(line, warn=False)
+                if parsed_data:
+                    yield parsed_data
+
+def build_index(input_directory, index_file):
+    """
+    Parse the FI files and build an indexed SQLite store (see fi_index.FICodeStore).
+
+    :param input_directory: str, data_fi directory
+    :param index_file: str, path to the SQLite file
+    :return: int, number of records stored
+    """
+    from .fi_index import build_fi_index
+    total_lines = build_fi_index(_iter_fi_records(input_directory), index_file)
+    logger.info(f"Total lines indexed: {total_lines}")
+    return total_lines
+
+def _parse_fi_file(file_path):
+    # 在子进程中解析一个文件，返回已序列化的记录（JSON 字符串）和跳过的行数
+    records = []
+    skipped = 0
+    with open(file_path, 'r', encoding='EUC-JP') as file:
+        for line in file:
+            parsed_data = parse_line(line, warn=False)
+            if parsed_data:
+                records.append(json.dumps(parsed_data, ensure_ascii=False, separators=(',', ':')))
+            else:
+                skipped += 1
+    return records, skipped
+
+def process_files_streaming(input_directory, output_file, output_format='jsonl', max_workers=None):
+    """
+    Parse the FI files in parallel and write records as they arrive.
+
+    Files are parsed in a process pool (one file per task, in sorted path order) and written
+    in that order, with at most 2 * max_workers parsed files held in memory at a time, so
+    memory stays flat however many files the data_fi release contains.
+
+    :param input_directory: str, data_fi directory
+    :param output_file: str, output path
+    :param output_format: str, 'jsonl' (one record per line) or 'json' (a compact JSON array)
+    :param max_workers: int, number of worker processes (default: os.cpu_count())
+    :return: dict, file path -> {'lines': parsed lines, 'skipped': skipped lines}
+    """
+    if output_format not in ('jsonl', 'json'):
+        raise ValueError(f"Unsupported output format: {output_format}. Choose 'jsonl' or 'json'.")
+    max_workers = max_workers or os.cpu_count() or 1
+    file_paths = iter(sorted(_iter_fi_files(input_directory)))
+    stats = {}
+    first = True
+
+    with open(output_file, 'w', encoding='utf-8') as output, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if output_format == 'json':
+            output.write('[')
+
+        # 保持有限数量的任务在运行，按提交顺序写出结果
+        in_flight = deque()
+        for file_path in file_paths:
+            in_flight.append((file_path, executor.submit(_parse_fi_file, file_path)))
+            if len(in_flight) >= 2 * max_workers:
+                break
+        while in_flight:
+            file_path, future = in_flight.popleft()
+            records, skipped = future.result()
+            next_path = next(file_paths, None)
+            if next_path is not None:
+                in_flight.append((next_path, executor.submit(_parse_fi_file, next_path)))
+
+            if output_format == 'json':
+                for record in records:
+                    output.write(record if first else ',\n' + record)
+                    first = False
+            elif records:
+                output.write('\n'.join(records))
+                output.write('\n')
+
+            stats[file_path] = {'lines': len(records), 'skipped': skipped}
+            logger.info(f"{file_path}: {len(records)} lines processed, {skipped} skipped")
+
+        if output_format == 'json':
+            output.write(']\n')
+
+    # 记录总共转换的行数和跳过的行数
+    logger.info(f"Total lines processed: {sum(stat['lines'] for stat in stats.values())}")
+    logger.info(f"Total lines skipped: {sum(stat['skipped'] for stat in stats.values())}")
+    return stats
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    input_directory = r"C:\Users\Ken\Desktop\Test\IPCtest\data_20240808\data_fi"
+    output_file = r"C:\Users\Ken\Desktop\Test\IPCtest\output_fi.json"
+    process_files(input_directory, output_file)
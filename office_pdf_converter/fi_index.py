@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Indexed SQLite store for the parsed FI code records.
+
+The records written by fi_codetransfer are loaded once into an SQLite file with B-tree
+indexes on id, subclass and smallclass, so a lookup touches a few pages instead of loading
+and scanning the whole JSON table. Descriptions are searchable through an FTS5 trigram
+index (which handles Japanese text without a word segmenter) when the SQLite build has
+FTS5, and through LIKE otherwise.
+"""
+
+import os
+import sqlite3
+from urllib.parse import quote
+
+FIELDS = ('id', 'subclass', 'smallclass', 'fi_code', 'ja_description', 'en_description')
+
+SEARCH_COLUMNS = {'ja': 'ja_description', 'en': 'en_description'}
+
+
+def _has_fts5_trigram(connection):
+    try:
+        connection.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(text, tokenize='trigram')")
+        connection.execute("DROP TABLE temp.fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _prefix_bounds(prefix):
+    # Half-open key range [prefix, upper) holding every string that starts with prefix
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def build_fi_index(records, index_file, batch_size=10000):
+    """
+    Write FI records to an indexed SQLite file.
+
+    The file is built next to index_file and renamed into place when complete, so readers
+    never open a half-built index.
+
+    :param records: iterable of dict, records as produced by fi_codetransfer.parse_line
+                    (a generator is consumed in batches, or pass json.load of output_fi.json)
+    :param index_file: str, path to the SQLite file
+    :param batch_size: int, records inserted per executemany call
+    :return: int, number of records stored
+    """
+    temp_file = index_file + '.tmp'
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    connection = sqlite3.connect(temp_file)
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute(f"CREATE TABLE fi ({', '.join(f'{field} TEXT' for field in FIELDS)})")
+
+        count = 0
+        batch = []
+        insert = f"INSERT INTO fi VALUES ({', '.join('?' * len(FIELDS))})"
+        for record in records:
+            batch.append(tuple(record.get(field, '') for field in FIELDS))
+            if len(batch) >= batch_size:
+                connection.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+        connection.executemany(insert, batch)
+        count += len(batch)
+
+        # Indexes are created after loading, which is much faster than maintaining them per insert
+        connection.execute("CREATE INDEX fi_id ON fi (id)")
+        connection.execute("CREATE INDEX fi_subclass ON fi (subclass, smallclass)")
+        connection.execute("CREATE INDEX fi_smallclass ON fi (smallclass)")
+
+        fts = _has_fts5_trigram(connection)
+        if fts:
+            connection.execute("CREATE VIRTUAL TABLE fi_fts USING fts5(ja_description, en_description, "
+                               "content='fi', content_rowid='rowid', tokenize='trigram')")
+            connection.execute("INSERT INTO fi_fts (fi_fts) VALUES ('rebuild')")
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [('records', str(count)), ('fts', '1' if fts else '0')])
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    os.replace(temp_file, index_file)
+    return count
+
+
+class FICodeStore:
+    def __init__(self, index_file):
+        """
+        Open an index built by build_fi_index (read-only).
+
+        :param index_file: str, path to the SQLite file
+        """
+        if not os.path.isfile(index_file):
+            raise FileNotFoundError(index_file)
+        self.connection = sqlite3.connect(f"file:{quote(os.path.abspath(index_file))}?mode=ro", uri=True,
+                                          check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        self.fts = meta.get('fts') == '1'
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM fi").fetchone()[0]
+
+    def _query(self, sql, parameters=()):
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def get(self, fi_id):
+        """
+        :param fi_id: str, record id, e.g. 'A01B1_00AB'
+        :return: dict, the record, or None if there is no such id
+        """
+        rows = self._query("SELECT * FROM fi WHERE id = ? ORDER BY rowid LIMIT 1", (fi_id,))
+        return rows[0] if rows else None
+
+    def by_subclass(self, prefix, limit=None):
+        """
+        :param prefix: str, subclass or subclass prefix, e.g. 'A01B' or 'A01'
+        :param limit: int, maximum number of records (default: all)
+        :return: list of dict, matching records ordered by subclass and smallclass
+        """
+        if not prefix:
+            return self._query("SELECT * FROM fi ORDER BY subclass, smallclass LIMIT ?", (limit or -1,))
+        low, high = _prefix_bounds(prefix)
+        return self._query("SELECT * FROM fi WHERE subclass >= ? AND subclass < ? ORDER BY subclass, smallclass LIMIT ?",
+                           (low, high, limit or -1))
+
+    def by_smallclass(self, prefix, subclass=None, limit=None):
+        """
+        :param prefix: str, smallclass or smallclass prefix, e.g. '1/00' or '1/'
+        :param subclass: str, restrict the scan to one subclass (uses the (subclass, smallclass) index)
+        :param limit: int, maximum number of records (default: all)
+        :return: list of dict, matching records ordered by smallclass
+        """
+        low, high = _prefix_bounds(prefix) if prefix else ('', '\U0010ffff')
+        if subclass is not None:
+            return self._query("SELECT * FROM fi WHERE subclass = ? AND smallclass >= ? AND smallclass < ? "
+                               "ORDER BY smallclass LIMIT ?", (subclass, low, high, limit or -1))
+        return self._query("SELECT * FROM fi WHERE smallclass >= ? AND smallclass < ? ORDER BY smallclass LIMIT ?",
+                           (low, high, limit or -1))
+
+    def search(self, text, language=None, limit=50):
+        """
+        Find records whose description contains text (case-insensitive for Latin letters).
+
+        :param text: str, substring to look for
+        :param language: str, 'ja' or 'en' to search one description (default: both)
+        :param limit: int, maximum number of records
+        :return: list of dict, matching records
+        """
+        if language is not None and language not in SEARCH_COLUMNS:
+            raise ValueError(f"Unsupported language: {language}. Choose 'ja' or 'en'.")
+        columns = [SEARCH_COLUMNS[language]] if language else list(SEARCH_COLUMNS.values())
+
+        # Trigram matching needs at least three characters; shorter queries fall back to LIKE
+        if self.fts and len(text) >= 3:
+            phrase = '"' + text.replace('"', '""') + '"'
+            query = f"{{{' '.join(columns)}}} : {phrase}"
+            return self._query("SELECT fi.* FROM fi_fts JOIN fi ON fi.rowid = fi_fts.rowid "
+                               "WHERE fi_fts MATCH ? ORDER BY fi.rowid LIMIT ?", (query, limit))
+
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        condition = ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in columns)
+        return self._query(f"SELECT * FROM fi WHERE {condition} ORDER BY rowid LIMIT ?",
+                           (*[pattern] * len(columns), limit))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry of the TrueType fonts used by the converters.
+
+Parsing a CJK font such as ipaexg.ttf takes a noticeable amount of time, so each font is
+parsed once per process and reused by every later conversion. Several fonts can be
+registered side by side under different names.
+
+ReportLab embeds TTFont objects as subsets: only the glyphs that were actually drawn end
+up in the output PDF, whichever converter (canvas or xhtml2pdf) used the font.
+"""
+
+import os
+import threading
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+DEFAULT_FONT_NAME = 'JapaneseFont'
+
+_fonts = {}
+_lock = threading.Lock()
+
+
+def register_font(font_path, font_name=DEFAULT_FONT_NAME):
+    """
+    Register a TrueType font with ReportLab, parsing the file only the first time.
+
+    Registering the same name with a different file replaces the earlier font.
+
+    :param font_path: str, path to the .ttf font file
+    :param font_name: str, name under which the font is used in PDFs and CSS
+    :return: str, the registered font name
+    """
+    font_key = os.path.abspath(font_path)
+    with _lock:
+        registered = _fonts.get(font_name)
+        if registered is None or registered[0] != font_key:
+            font = TTFont(font_name, font_path)
+            pdfmetrics.registerFont(font)
+            _fonts[font_name] = (font_key, font)
+    return font_name
+
+
+def registered_fonts():
+    """
+    :return: dict, font name -> absolute path of every font registered in this process
+    """
+    with _lock:
+        return {font_name: font_key for font_name, (font_key, _) in _fonts.items()}
+
+
+def configure_html_fonts(default_font_name=None):
+    """
+    Make the registered fonts available to xhtml2pdf.
+
+    Each registered font can be selected by its name in CSS font-family, and
+    default_font_name (if given) replaces xhtml2pdf's default Helvetica. Paragraphs use
+    CJK word wrapping so Japanese text breaks between characters.
+
+    :param default_font_name: str, registered font used when no font-family matches
+    """
+    from xhtml2pdf.default import DEFAULT_FONT
+    import reportlab.lib.styles
+
+    reportlab.lib.styles.ParagraphStyle.defaults['wordWrap'] = 'CJK'
+    with _lock:
+        for font_name in _fonts:
+            DEFAULT_FONT[font_name.lower()] = font_name
+    if default_font_name:
+        DEFAULT_FONT['helvetica'] = default_font_name
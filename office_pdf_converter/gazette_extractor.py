@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Field extraction from JP official gazette XML (jp-official-gazette documents).
+
+The selected bibliographic, claims, description and abstract fields are collected in one
+pass of ElementTree.iterparse: only the elements on a wanted path are kept until their end
+tag, everything else is discarded as soon as it is closed, so time and memory follow the
+fields rather than the size of the document. The full xmltodict dump (_FullVer.json) is
+only produced on request.
+
+extract_gazette_batch runs the extraction over a folder or a tar/zip archive in a process
+pool and writes one JSON line per document, with failures recorded as error lines.
+"""
+
+import argparse
+import json
+import logging
+import os
+import tarfile
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+ROOT_TAG = 'jp-official-gazette'
+
+BIBLIOGRAPHIC = (ROOT_TAG, 'bibliographic-data')
+DESCRIPTION = (ROOT_TAG, 'description')
+
+# Output field -> (element path, how the matched elements are combined):
+#   'first'  text of the first match
+#   'all'    list with the text of every match
+#   'terms'  like xmltodict: a string for one match, a list for several
+#   'ipc'    first two words of the first match
+#   'claims' texts of every match joined by spaces, indentation newlines removed
+#   'p'      paragraph text; several paragraphs are joined by newlines
+GAZETTE_FIELDS = {
+    'publication-doc-number': (BIBLIOGRAPHIC + ('publication-reference', 'document-id', 'doc-number'), 'first'),
+    'publication-country': (BIBLIOGRAPHIC + ('publication-reference', 'document-id', 'country'), 'first'),
+    'publication-kind': (BIBLIOGRAPHIC + ('publication-reference', 'document-id', 'kind'), 'first'),
+    'publication-date': (BIBLIOGRAPHIC + ('publication-reference', 'document-id', 'date'), 'first'),
+    'application-doc-number': (BIBLIOGRAPHIC + ('application-reference', 'document-id', 'doc-number'), 'first'),
+    'application-date': (BIBLIOGRAPHIC + ('application-reference', 'document-id', 'date'), 'first'),
+    'invention-title': (BIBLIOGRAPHIC + ('invention-title',), 'first'),
+    'applicant-name': (BIBLIOGRAPHIC + ('parties', 'jp:applicants-agents-article', 'jp:applicants-agents', 'applicant',
+                                        'addressbook', 'name'), 'first'),
+    'inventor-name': (BIBLIOGRAPHIC + ('parties', 'inventors', 'inventor', 'addressbook', 'name'), 'all'),
+    'classification-ipc': (BIBLIOGRAPHIC + ('classification-ipc', 'main-clsf'), 'ipc'),
+    'classification-national': (BIBLIOGRAPHIC + ('classification-national', 'main-clsf'), 'first'),
+    'jp:f-term': (BIBLIOGRAPHIC + ('jp:f-term-info', 'jp:f-term'), 'terms'),
+    'technical-field': (DESCRIPTION + ('technical-field', 'p'), 'p'),
+    'background-art': (DESCRIPTION + ('background-art', 'p'), 'p'),
+    'tech-problem': (DESCRIPTION + ('summary-of-invention', 'tech-problem', 'p'), 'p'),
+    'advantageous-effects': (DESCRIPTION + ('summary-of-invention', 'advantageous-effects', 'p'), 'p'),
+    'best-mode': (DESCRIPTION + ('best-mode', 'p'), 'p'),
+    'claim': ((ROOT_TAG, 'claims', 'claim', 'claim-text'), 'claims'),
+    'abstract': ((ROOT_TAG, 'abstract', 'p'), 'p'),
+}
+
+# Fields a document must contain; the others default to "" (or [] for inventor-name)
+REQUIRED_FIELDS = frozenset({
+    'publication-doc-number', 'publication-country', 'publication-kind', 'publication-date',
+    'application-doc-number', 'application-date', 'invention-title', 'applicant-name',
+    'classification-ipc', 'classification-national', 'jp:f-term', 'technical-field',
+    'background-art', 'claim', 'abstract',
+})
+
+# Batch mode also rejects documents without a technical problem statement
+BATCH_REQUIRED_FIELDS = REQUIRED_FIELDS | {'tech-problem'}
+
+_PATH_FIELDS = {path: name for name, (path, _) in GAZETTE_FIELDS.items()}
+
+
+class MissingFieldError(KeyError):
+    """A required field is absent from the gazette document."""
+
+
+def _element_text(element):
+    # Text of an element and its descendants, with <br/> as a newline
+    parts = [element.text or '']
+    for child in element:
+        parts.append('\n' if child.tag.rpartition('}')[2] == 'br' else _element_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def _normalize_text(text):
+    # Same clean-up the xmltodict-based script applied: collapse doubled newlines, strip
+    return text.replace('\n\n', '\n').strip()
+
+
+def _combine(mode, texts):
+    if mode == 'all':
+        return texts
+    if mode == 'terms':
+        return texts[0] if len(texts) == 1 else texts
+    if mode == 'ipc':
+        return ' '.join(texts[0].split()[:2])
+    if mode == 'claims':
+        return ' '.join(text.replace('\n  ', '').strip() for text in texts)
+    if mode == 'p':
+        return '\n'.join(texts)
+    return texts[0]
+
+
+def extract_gazette(source, required=REQUIRED_FIELDS):
+    """
+    Extract the selected fields of one gazette document.
+
+    :param source: str or binary file object, the gazette XML
+    :param required: iterable of str, fields that must be present (default: REQUIRED_FIELDS)
+    :return: dict, field name -> value, in GAZETTE_FIELDS order
+    :raises MissingFieldError: if a required field is absent
+    :raises xml.etree.ElementTree.ParseError: if the XML is malformed
+    """
+    prefixes = {}
+    path = []
+    elements = []
+    capturing = 0  # number of open elements on a wanted path
+    found = {}
+
+    for event, item in ET.iterparse(source, events=('start-ns', 'start', 'end')):
+        if event == 'start-ns':
+            prefix, uri = item
+            prefixes.setdefault(uri, prefix)
+            continue
+
+        tag = item.tag
+        if tag[0] == '{':
+            uri, _, local = tag[1:].partition('}')
+            prefix = prefixes.get(uri)
+            tag = f"{prefix}:{local}" if prefix else local
+
+        if event == 'start':
+            path.append(tag)
+            elements.append(item)
+            if tuple(path) in _PATH_FIELDS:
+                capturing += 1
+            continue
+
+        key = tuple(path)
+        name = _PATH_FIELDS.get(key)
+        if name is not None:
+            found.setdefault(name, []).append(_normalize_text(_element_text(item)))
+            capturing -= 1
+        path.pop()
+        elements.pop()
+        # Drop finished elements unless a wanted ancestor still needs their text
+        if not capturing:
+            item.clear()
+            if elements:
+                elements[-1].remove(item)
+
+    required = set(required)
+    result = {}
+    for name, (_, mode) in GAZETTE_FIELDS.items():
+        texts = found.get(name)
+        if texts:
+            result[name] = _combine(mode, texts)
+        elif name in required:
+            raise MissingFieldError(name)
+        else:
+            result[name] = [] if mode == 'all' else ""
+    return result
+
+
+def write_full_json(xml_path, output_path):
+    """
+    Write the complete document as xmltodict JSON (the _FullVer.json dump).
+
+    This loads the whole document into memory; xmltodict is only imported here.
+
+    :param xml_path: str, path to the gazette XML
+    :param output_path: str, path to the JSON file
+    """
+    import xmltodict
+
+    with open(xml_path, 'r', encoding='utf-8') as xml_file:
+        xml_content = xml_file.read()
+    # Preprocess XML content: replace <br/> with newline character
+    xml_content = xml_content.replace('<br/>', '\n').replace('\n\n', '\n')
+    xml_dict = xmltodict.parse(xml_content, encoding='utf-8')
+    with open(output_path, 'w', encoding='utf-8') as json_file:
+        json.dump(xml_dict, json_file, ensure_ascii=False, indent=2)
+
+
+def convert_gazette(xml_path, output_dir='.', full=False, required=REQUIRED_FIELDS):
+    """
+    Write <name>_selectedVer.json (and <name>_FullVer.json when full is set) for a gazette XML file.
+
+    :param xml_path: str, path to the gazette XML
+    :param output_dir: str, folder receiving the JSON files
+    :param full: bool, also write the full xmltodict dump
+    :param required: iterable of str, fields that must be present
+    :return: dict, 'selected' (and 'full') -> path of the written file
+    """
+    base_name = os.path.splitext(os.path.basename(xml_path))[0]
+    outputs = {}
+    if full:
+        outputs['full'] = os.path.join(output_dir, f'{base_name}_FullVer.json')
+        write_full_json(xml_path, outputs['full'])
+
+    filtered_data = extract_gazette(xml_path, required)
+    outputs['selected'] = os.path.join(output_dir, f'{base_name}_selectedVer.json')
+    with open(outputs['selected'], 'w', encoding='utf-8') as output_file:
+        json.dump(filtered_data, output_file, ensure_ascii=False, indent=2)
+    return outputs
+
+
+def iter_gazette_sources(source):
+    """
+    List the gazette documents of a folder or archive without extracting anything to disk.
+
+    :param source: str, folder (searched recursively), tar archive (any compression) or zip archive
+    :return: generator of (name, document), where document is a file path for folders and
+             the member bytes for archives; only *.xml files are returned
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.lower().endswith('.xml'):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, source), path
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith('.xml'):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(source):
+        # Stream mode reads the members in archive order without seeking
+        with tarfile.open(source, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith('.xml'):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"Not a folder, tar or zip archive: {source}")
+
+
+def _extract_record(name, document, required):
+    # Worker task: (error message or None, JSON line with either the fields or the error)
+    try:
+        fields = extract_gazette(BytesIO(document) if isinstance(document, bytes) else document, required)
+        record = {'source': name, **fields}
+    except MissingFieldError as e:
+        record = {'source': name, 'error': 'MissingFieldError', 'message': f"Missing required field: {e.args[0]}"}
+    except Exception as e:
+        record = {'source': name, 'error': type(e).__name__, 'message': str(e)}
+    return record.get('message'), json.dumps(record, ensure_ascii=False)
+
+
+def extract_gazette_batch(source, output_file, max_workers=None, required=BATCH_REQUIRED_FIELDS):
+    """
+    Extract every gazette document of a folder or archive into one JSON Lines file.
+
+    Documents are parsed in a process pool with at most 4 * max_workers of them in flight, and
+    lines are written in source order. A document that fails (missing required field, malformed
+    XML, ...) produces {"source", "error", "message"} instead of its fields; the batch goes on.
+
+    :param source: str, folder, tar archive or zip archive (see iter_gazette_sources)
+    :param output_file: str, path to the JSON Lines file
+    :param max_workers: int, number of worker processes (default: os.cpu_count())
+    :param required: iterable of str, fields that must be present (default: BATCH_REQUIRED_FIELDS)
+    :return: dict, 'documents' and 'errors' counts
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    required = frozenset(required)
+    documents = iter_gazette_sources(source)
+    counts = {'documents': 0, 'errors': 0}
+
+    with open(output_file, 'w', encoding='utf-8') as output, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+
+        def submit_next():
+            item = next(documents, None)
+            if item is not None:
+                in_flight.append((item[0], executor.submit(_extract_record, item[0], item[1], required)))
+            return item is not None
+
+        while len(in_flight) < 4 * max_workers and submit_next():
+            pass
+        while in_flight:
+            name, future = in_flight.popleft()
+            error, line = future.result()
+            submit_next()
+            output.write(line)
+            output.write('\n')
+            counts['documents'] += 1
+            if error is not None:
+                counts['errors'] += 1
+                logger.error(f"{name}: {error}")
+
+    logger.info(f"{counts['documents']} document(s) extracted to {output_file}, {counts['errors']} error(s)")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract selected fields from JP gazette XML files.")
+    parser.add_argument('source', help="gazette XML file, folder, or tar/zip archive")
+    parser.add_argument('-o', '--output', default=None,
+                        help="JSON Lines output for a folder/archive (default: <source name>.jsonl); "
+                             "output folder for a single XML file (default: current folder)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--full', action='store_true', help="single XML file: also write <name>_FullVer.json")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if os.path.isfile(args.source) and args.source.lower().endswith('.xml'):
+        outputs = convert_gazette(args.source, args.output or '.', full=args.full)
+        logger.info(f"Filtered JSON data has been saved to {outputs['selected']}")
+        return 0
+    output = args.output or os.path.basename(os.path.normpath(args.source)).split('.')[0] + '.jsonl'
+    counts = extract_gazette_batch(args.source, output, args.workers)
+    return 1 if counts['errors'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Structured instrumentation for the converters.
+
+A converter given an Instrumentation reports one 'stage' record per pipeline step (parse,
+layout, encode, ...) and one 'run' record per conversion with the total time, counters
+(pages, slides, rows, bytes, ...) and peak memory. Records are plain dicts passed to a
+callback and/or appended to a JSON-lines log. With profile_dir set, every run is also
+captured with cProfile and its stats written there for pstats/snakeviz.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+# Shared by every instance, so instances stay picklable for worker processes
+_log_lock = threading.Lock()
+
+
+def peak_rss_bytes(children=False):
+    """
+    :param children: bool, report the largest terminated child process instead of this process
+    :return: int, peak resident set size in bytes, or None where unavailable
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage.ru_maxrss if os.uname().sysname == 'Darwin' else usage.ru_maxrss * 1024
+
+
+class Instrumentation:
+    def __init__(self, callback=None, log_path=None, profile_dir=None):
+        """
+        Initialize the Instrumentation class.
+
+        :param callback: callable, called with each record (a dict)
+        :param log_path: str, JSON-lines file each record is appended to
+        :param profile_dir: str, folder receiving a <converter>-<pid>-<time>.prof file per run (optional)
+        """
+        self.callback = callback
+        self.log_path = log_path
+        self.profile_dir = profile_dir
+        self.counters = {}
+        self.converter = None
+
+    @property
+    def enabled(self):
+        return self.callback is not None or self.log_path is not None
+
+    def emit(self, record):
+        # Deliver one record to the callback and the log
+        if self.callback is not None:
+            self.callback(record)
+        if self.log_path is not None:
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            with _log_lock, open(self.log_path, 'a', encoding='utf-8') as log_file:
+                log_file.write(line)
+
+    def count(self, name, value=1):
+        """
+        Add value to a counter reported with the run record.
+
+        :param name: str, counter name, e.g. 'pages' or 'image_bytes'
+        :param value: int, amount to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """
+        Time one pipeline stage.
+
+        The yielded dict is included in the record, so the stage can add figures that are only
+        known at its end (bytes written, pages laid out, ...).
+
+        :param name: str, stage name, e.g. 'parse' or 'layout'
+        :param fields: extra fields for the record
+        """
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            if self.enabled:
+                self.emit(dict(fields, event='stage', converter=self.converter, stage=name,
+                               seconds=time.perf_counter() - start, peak_rss_bytes=peak_rss_bytes()))
+
+    @contextmanager
+    def run(self, converter, **fields):
+        """
+        Wrap one conversion: resets the counters, optionally profiles it, and emits the run record.
+
+        :param converter: str, converter name, e.g. 'word'
+        :param fields: extra fields for the record, e.g. input and output paths
+        """
+        self.converter = converter
+        self.counters = {}
+        profiler = cProfile.Profile() if self.profile_dir else None
+        status = 'error'
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield fields
+            status = 'ok'
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                fields['profile'] = os.path.join(self.profile_dir, f"{converter}-{os.getpid()}-{time.time_ns()}.prof")
+                profiler.dump_stats(fields['profile'])
+            if self.enabled:
+                self.emit(dict(fields, event='run', converter=converter, status=status, seconds=seconds,
+                               counters=dict(self.counters), peak_rss_bytes=peak_rss_bytes(),
+                               peak_child_rss_bytes=peak_rss_bytes(children=True)))
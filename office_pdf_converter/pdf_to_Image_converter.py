@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 24 23:41:55 2024
+
+@author: Ken
+"""
+
+import fitz  # PyMuPDF
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from .instrumentation import Instrumentation
+
+logger = logging.getLogger(__name__)
+
+class PDFToImageConverter:
+    def __init__(self, input_path, output_base_folder=None, instrumentation=None):
+        """
+        Initialize the PDFToImageConverter class.
+        
+        :param input_path: str, path to the input PDF file
+        :param output_base_folder: str, path to the base folder where output images will be saved
+                                   (may be omitted when only iter_page_images is used)
+        :param instrumentation: Instrumentation, receives stage timings and counts (optional)
+        """
+        self.input_path = input_path
+        self.instrumentation = instrumentation or Instrumentation()
+        self.output_folder = self._create_output_folder(output_base_folder) if output_base_folder is not None else None
+
+    def _create_output_folder(self, base_folder):
+        """
+        Create a directory for the output images based on the PDF file name.
+        
+        :param base_folder: str, the base directory where the output folder will be created
+        :return: str, the path to the created output folder
+        """
+        # Extract base name of the PDF file without extension
+        pdf_name = os.path.basename(self.input_path)
+        folder_name = os.path.splitext(pdf_name)[0]
+        output_folder = os.path.join(base_folder, folder_name)
+
+        # Ensure the folder exists
+        os.makedirs(output_folder, exist_ok=True)
+        return output_folder
+
+    def convert_pdf_to_images(self, zoom_factor=2.0, workers=1, image_format='png', quality=90, grayscale=False, alpha=False,
+                              resume=False):
+        """
+        Convert each page of a PDF file into high-resolution images and save them.
+        
+        :param zoom_factor: float, scaling factor to adjust the resolution of the output images
+                            - Default is 2.0, meaning images are enlarged by 2 times (i.e., 4 times more pixels)
+                            - Higher values will produce higher resolution images but require more memory and processing time
+        :param workers: int, number of worker processes used to render pages
+                        - Default is 1, rendering every page in the current process
+                        - Each worker opens the document once and renders the pages handed to it
+        :param image_format: str, output format: 'png' (default), 'jpeg' or 'webp'
+                             - PNG and JPEG are encoded by PyMuPDF straight from the rendered pixmap
+                             - WebP is encoded by PIL from a view of the pixmap samples (no extra copy)
+        :param quality: int, 1-100, encoder quality for JPEG and WebP
+        :param grayscale: bool, render in the DeviceGray colorspace (one byte per pixel)
+        :param alpha: bool, keep a transparent background (PNG and WebP only)
+        :param resume: bool, skip pages already rendered by an earlier run
+                       - Every run records finished pages in a manifest in the output folder, together with
+                         a hash of the source file and the render settings
+                       - With resume, pages listed there whose image file is still intact are kept; pages
+                         that are missing, truncated, or were rendered from another file or settings are redone
+        :return: dict, page number -> error message for every page that could not be rendered
+                 (empty when all pages were saved); a failing page does not stop the others
+        """
+        if not self.input_path.lower().endswith('.pdf'):
+            raise ValueError("Input file is not a PDF.")
+        if self.output_folder is None:
+            raise ValueError("No output folder: pass output_base_folder or use iter_page_images.")
+        image_options = _image_options(image_format, quality, grayscale, alpha)
+
+        with self.instrumentation.run('pdf_images', input=self.input_path, output=self.output_folder,
+                                      zoom_factor=zoom_factor, image_format=image_format, workers=workers):
+            errors = self._convert_pdf_to_images(zoom_factor, workers, image_options, resume)
+
+        if errors:
+            logger.error(f"{len(errors)} page(s) could not be rendered: {sorted(errors)} "
+                         f"(output folder: {self.output_folder})")
+        else:
+            logger.info(f"All pages have been saved to the folder: {self.output_folder}")
+        return errors
+
+    def _convert_pdf_to_images(self, zoom_factor, workers, image_options, resume):
+        manifest = RenderManifest(self.output_folder, self.input_path, dict(image_options, zoom_factor=zoom_factor))
+        if resume:
+            manifest.load()
+        with fitz.open(self.input_path) as pdf_document:
+            page_count = pdf_document.page_count
+        pending = [page_number for page_number in range(page_count) if not manifest.is_complete(page_number + 1)]
+        if len(pending) < page_count:
+            logger.info(f"Resuming: {page_count - len(pending)} of {page_count} page(s) already rendered")
+        manifest.save()
+
+        with self.instrumentation.stage('render', pages=len(pending), workers=workers) as stage:
+            if workers > 1:
+                errors = self._convert_pages_parallel(zoom_factor, workers, image_options, pending, manifest)
+            else:
+                errors = {}
+                # Rasterize and encode times are only split out in-process
+                stage.update(rasterize_seconds=0.0, encode_seconds=0.0)
+                # Open the PDF document
+                pdf_document = fitz.open(self.input_path)
+                try:
+                    for page_number in pending:
+                        try:
+                            image_path = _render_page(pdf_document, page_number, self.output_folder, zoom_factor, image_options,
+                                                      timings=stage)
+                        except Exception as e:
+                            errors[page_number + 1] = f"{type(e).__name__}: {e}"
+                            logger.error(f"Page {page_number + 1} failed: {errors[page_number + 1]}")
+                            continue
+                        manifest.mark_complete(page_number + 1, image_path)
+                        self.instrumentation.count('image_bytes', os.path.getsize(image_path))
+                        logger.info(f"Page {page_number + 1} saved as {image_path}")
+                finally:
+                    pdf_document.close()
+            stage['failed'] = len(errors)
+
+        self.instrumentation.count('pages', len(pending) - len(errors))
+        self.instrumentation.count('failed_pages', len(errors))
+        return errors
+
+    def convert_pdf_to_variants(self, variants, pages=None, image_format='png', quality=90, grayscale=False, alpha=False,
+                                max_tile_pixels=16_000_000, tile_size=4096):
+        """
+        Render several resolutions of each page from a single page load.
+
+        Each page is loaded and interpreted once into a display list, which is then rasterized
+        at every zoom factor, so thumbnails, previews and archive images come out of one pass.
+        Images go to <output folder>/<variant name>/page_<n>.<ext>. Variants whose pixel count
+        would exceed max_tile_pixels are rendered and saved in tiles of tile_size x tile_size
+        pixels (page_<n>_r<row>_c<col>.<ext>) so no full-size buffer is ever allocated.
+
+        :param variants: dict, variant name -> zoom factor, e.g. {'thumb': 0.25, 'preview': 1.0, 'archive': 2.0}
+        :param pages: iterable of int, 1-based page numbers to render (default: all pages)
+        :param image_format: str, 'png', 'jpeg' or 'webp'
+        :param quality: int, 1-100, encoder quality for JPEG and WebP
+        :param grayscale: bool, render in the DeviceGray colorspace
+        :param alpha: bool, keep a transparent background (PNG and WebP only)
+        :param max_tile_pixels: int, largest image (in pixels) rendered in one piece
+        :param tile_size: int, edge length in pixels of the tiles used above max_tile_pixels
+        :return: dict, page number -> error message for every page that could not be rendered
+        """
+        if not self.input_path.lower().endswith('.pdf'):
+            raise ValueError("Input file is not a PDF.")
+        if self.output_folder is None:
+            raise ValueError("No output folder: pass output_base_folder to the constructor.")
+        if not variants:
+            raise ValueError("At least one variant is required.")
+        image_options = _image_options(image_format, quality, grayscale, alpha)
+
+        for variant_name in variants:
+            os.makedirs(os.path.join(self.output_folder, variant_name), exist_ok=True)
+
+        errors = {}
+        with self.instrumentation.run('pdf_images', input=self.input_path, output=self.output_folder,
+                                      variants=variants, image_format=image_format), \
+                self.instrumentation.stage('render', variants=len(variants)) as stage:
+            pdf_document = fitz.open(self.input_path)
+            try:
+                for page_number in _resolve_pages(pages, pdf_document.page_count):
+                    try:
+                        page = pdf_document.load_page(page_number - 1)
+                        display_list = page.get_displaylist()
+                        for variant_name, zoom_factor in variants.items():
+                            variant_folder = os.path.join(self.output_folder, variant_name)
+                            _render_variant(display_list, page.rect, page_number, variant_folder, zoom_factor,
+                                            image_options, max_tile_pixels, tile_size)
+                    except Exception as e:
+                        errors[page_number] = f"{type(e).__name__}: {e}"
+                        logger.error(f"Page {page_number} failed: {errors[page_number]}")
+                        continue
+                    self.instrumentation.count('pages')
+                    logger.info(f"Page {page_number} saved in {len(variants)} variant(s)")
+            finally:
+                pdf_document.close()
+            stage.update(pages=self.instrumentation.counters.get('pages', 0), failed=len(errors))
+            self.instrumentation.count('failed_pages', len(errors))
+
+        if errors:
+            logger.error(f"{len(errors)} page(s) could not be rendered: {sorted(errors)} "
+                         f"(output folder: {self.output_folder})")
+        else:
+            logger.info(f"All variants have been saved to the folder: {self.output_folder}")
+        return errors
+
+    def iter_page_images(self, zoom_factor=2.0, pages=None, image_format='png', quality=90, grayscale=False, alpha=False, raw=False):
+        """
+        Lazily render pages in memory, without touching the filesystem.
+
+        Only one page is rendered at a time, so memory stays bounded by the largest page.
+
+        :param zoom_factor: float, scaling factor to adjust the resolution of the output images
+        :param pages: iterable of int, 1-based page numbers to render in the given order (default: all pages)
+        :param image_format: str, 'png', 'jpeg' or 'webp' (ignored when raw is True)
+        :param quality: int, 1-100, encoder quality for JPEG and WebP
+        :param grayscale: bool, render in the DeviceGray colorspace
+        :param alpha: bool, keep a transparent background
+        :param raw: bool, yield the raw pixel samples (row-major, 1/3 bytes per pixel, plus alpha) instead of an encoded image
+        :return: generator of (page_number, bytes, width, height)
+        """
+        if not self.input_path.lower().endswith('.pdf'):
+            raise ValueError("Input file is not a PDF.")
+        image_options = _image_options(image_format, quality, grayscale, alpha)
+
+        pdf_document = fitz.open(self.input_path)
+        try:
+            for page_number in _resolve_pages(pages, pdf_document.page_count):
+                page = pdf_document.load_page(page_number - 1)
+                pix = _get_pixmap(page, zoom_factor, image_options)
+                data = pix.samples if raw else _encode_pixmap(pix, image_options)
+                yield page_number, data, pix.width, pix.height
+        finally:
+            pdf_document.close()
+
+    def _convert_pages_parallel(self, zoom_factor, workers, image_options, pending, manifest):
+        """
+        Render pages in a process pool and collect per-page errors.
+
+        If a worker process dies (e.g. MuPDF crashes on a corrupt page) the pool breaks and every
+        unfinished page is retried in a fresh pool. When a round makes no progress at all, the
+        remaining pages are rendered one per process so that only the offending page fails.
+
+        :param zoom_factor: float, scaling factor passed to each page render
+        :param workers: int, number of worker processes
+        :param image_options: dict, output format settings from _image_options
+        :param pending: list of int, 0-based page numbers to render
+        :param manifest: RenderManifest, records every page as it completes
+        :return: dict, page number -> error message
+        """
+        errors = {}
+        isolate = False
+        while pending:
+            broken = []
+            batches = [[page_number] for page_number in pending] if isolate else [pending]
+            for batch in batches:
+                pool_size = 1 if isolate else min(workers, len(batch))
+                with ProcessPoolExecutor(max_workers=pool_size, initializer=_init_render_worker,
+                                         initargs=(self.input_path,)) as executor:
+                    futures = {executor.submit(_render_page_in_worker, page_number, self.output_folder, zoom_factor, image_options): page_number
+                               for page_number in batch}
+                    for future in as_completed(futures):
+                        page_number = futures[future]
+                        try:
+                            image_path = future.result()
+                        except BrokenProcessPool as e:
+                            if isolate:
+                                errors[page_number + 1] = f"Worker process crashed: {e}"
+                                logger.error(f"Page {page_number + 1} failed: {errors[page_number + 1]}")
+                            else:
+                                broken.append(page_number)
+                            continue
+                        except Exception as e:
+                            errors[page_number + 1] = f"{type(e).__name__}: {e}"
+                            logger.error(f"Page {page_number + 1} failed: {errors[page_number + 1]}")
+                            continue
+                        manifest.mark_complete(page_number + 1, image_path)
+                        self.instrumentation.count('image_bytes', os.path.getsize(image_path))
+                        logger.info(f"Page {page_number + 1} saved as {image_path}")
+
+            if isolate:
+                break
+            # Retry pages lost to a crashed worker; isolate them once a round completes nothing
+            isolate = len(broken) == len(pending)
+            pending = sorted(broken)
+        return errors
+
+
+class RenderManifest:
+    FILE_NAME = '.render_manifest.json'
+
+    def __init__(self, output_folder, input_path, settings):
+        """
+        Record of the pages already rendered into an output folder.
+
+        :param output_folder: str, folder holding the page images and the manifest file
+        :param input_path: str, path to the source PDF (identified by its SHA-256)
+        :param settings: dict, render settings; pages rendered with other settings are stale
+        """
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, self.FILE_NAME)
+        self.source_hash = _file_sha256(input_path)
+        self.settings = settings
+        self.pages = {}
+
+    def load(self):
+        # Adopt the pages of an existing manifest if it was written for the same source and settings
+        try:
+            with open(self.path, 'r', encoding='utf-8') as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return
+        if data.get('source_sha256') == self.source_hash and data.get('settings') == self.settings:
+            self.pages = data.get('pages', {})
+
+    def is_complete(self, page_number):
+        # A page counts as done if its image file still exists with the recorded size
+        entry = self.pages.get(str(page_number))
+        if entry is None:
+            return False
+        image_path = os.path.join(self.output_folder, entry['file'])
+        return os.path.isfile(image_path) and os.path.getsize(image_path) == entry['size']
+
+    def mark_complete(self, page_number, image_path):
+        self.pages[str(page_number)] = {'file': os.path.basename(image_path), 'size': os.path.getsize(image_path)}
+        self.save()
+
+    def save(self):
+        # Write to a temporary file and rename it, so an interrupted run never leaves a corrupt manifest
+        data = {'source_sha256': self.source_hash, 'settings': self.settings, 'pages': self.pages}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(data, manifest_file)
+        os.replace(temp_path, self.path)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Output formats: name -> file extension
+IMAGE_FORMATS = {'png': 'png', 'jpeg': 'jpg', 'webp': 'webp'}
+
+
+def _image_options(image_format, quality, grayscale, alpha):
+    # Validate the output format settings and bundle them for the render helpers
+    image_format = image_format.lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}. Choose from {sorted(IMAGE_FORMATS)}.")
+    if alpha and image_format == 'jpeg':
+        raise ValueError("JPEG output does not support an alpha channel.")
+    if not 1 <= quality <= 100:
+        raise ValueError("Quality must be between 1 and 100.")
+    return {
+        'format': image_format,
+        'extension': IMAGE_FORMATS[image_format],
+        'quality': quality,
+        'grayscale': grayscale,
+        'alpha': alpha,
+    }
+
+
+def _get_pixmap(page, zoom_factor, image_options, clip=None):
+    # Rasterize a page or display list (or a clip of it) in the colorspace requested by image_options
+    colorspace = fitz.csGRAY if image_options['grayscale'] else fitz.csRGB
+    zoom_matrix = fitz.Matrix(zoom_factor, zoom_factor)
+    return page.get_pixmap(matrix=zoom_matrix, colorspace=colorspace, alpha=image_options['alpha'], clip=clip)
+
+
+def _pixmap_to_pil(pix):
+    # Wrap the pixmap samples in a PIL image without copying them (PIL is only needed for WebP)
+    from PIL import Image
+    mode = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}[pix.n]
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, 'raw', mode, pix.stride, 1)
+
+
+def _resolve_pages(pages, page_count):
+    # Validate 1-based page numbers against the document; None selects every page
+    if pages is None:
+        return range(1, page_count + 1)
+    pages = list(pages)
+    invalid = [page_number for page_number in pages if not 1 <= page_number <= page_count]
+    if invalid:
+        raise ValueError(f"Page numbers out of range 1-{page_count}: {invalid}")
+    return pages
+
+
+def _encode_pixmap(pix, image_options):
+    # Encode the pixmap to bytes in memory
+    if image_options['format'] == 'png':
+        return pix.tobytes(output='png')
+    if image_options['format'] == 'jpeg':
+        return pix.tobytes(output='jpeg', jpg_quality=image_options['quality'])
+    buffer = BytesIO()
+    _pixmap_to_pil(pix).save(buffer, 'WEBP', quality=image_options['quality'])
+    return buffer.getvalue()
+
+
+def _save_pixmap(pix, image_path, image_options):
+    # Encode the pixmap to image_path, directly with PyMuPDF where it has an encoder
+    if image_options['format'] == 'png':
+        pix.save(image_path, output='png')
+    elif image_options['format'] == 'jpeg':
+        pix.save(image_path, output='jpeg', jpg_quality=image_options['quality'])
+    else:
+        _pixmap_to_pil(pix).save(image_path, 'WEBP', quality=image_options['quality'])
+
+
+def _render_variant(display_list, page_rect, page_number, variant_folder, zoom_factor, image_options, max_tile_pixels, tile_size):
+    # Rasterize one zoom level of a page's display list, tiling it if the image would be too large
+    extension = image_options['extension']
+    out_width, out_height = page_rect.width * zoom_factor, page_rect.height * zoom_factor
+    if out_width * out_height <= max_tile_pixels:
+        pix = _get_pixmap(display_list, zoom_factor, image_options)
+        _save_pixmap(pix, os.path.join(variant_folder, f"page_{page_number}.{extension}"), image_options)
+        return
+
+    step = tile_size / zoom_factor  # tile edge in page coordinates
+    rows, cols = math.ceil(out_height / tile_size), math.ceil(out_width / tile_size)
+    for row in range(rows):
+        for col in range(cols):
+            clip = fitz.Rect(page_rect.x0 + col * step, page_rect.y0 + row * step,
+                             page_rect.x0 + (col + 1) * step, page_rect.y0 + (row + 1) * step) & page_rect
+            pix = _get_pixmap(display_list, zoom_factor, image_options, clip=clip)
+            tile_path = os.path.join(variant_folder, f"page_{page_number}_r{row}_c{col}.{extension}")
+            _save_pixmap(pix, tile_path, image_options)
+
+
+def _render_page(pdf_document, page_number, output_folder, zoom_factor, image_options, timings=None):
+    # Render one page (0-based page_number) and save it as page_<n>.<extension>
+    # timings: dict whose 'rasterize_seconds'/'encode_seconds' entries are increased (optional)
+    start = time.perf_counter()
+    page = pdf_document.load_page(page_number)
+    pix = _get_pixmap(page, zoom_factor, image_options)
+    rasterized = time.perf_counter()
+    image_path = os.path.join(output_folder, f"page_{page_number + 1}.{image_options['extension']}")
+    _save_pixmap(pix, image_path, image_options)
+    if timings is not None:
+        timings['rasterize_seconds'] += rasterized - start
+        timings['encode_seconds'] += time.perf_counter() - rasterized
+    return image_path
+
+
+# Per-process state for the parallel mode: the document is opened once per worker
+_render_worker = {}
+
+
+def _init_render_worker(input_path):
+    _render_worker['document'] = fitz.open(input_path)
+
+
+def _render_page_in_worker(page_number, output_folder, zoom_factor, image_options):
+    return _render_page(_render_worker['document'], page_number, output_folder, zoom_factor, image_options)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the converters for post-processing PDF files.
+"""
+
+from io import BytesIO
+
+import fitz  # PyMuPDF
+
+
+def merge_pdf_files(pdf_paths, output_path, garbage=3):
+    """
+    Concatenate several PDF files into one, in the given order.
+
+    :param pdf_paths: list of str, paths to the PDF files to merge
+    :param output_path: str, path to the merged PDF file
+    :param garbage: int, PyMuPDF garbage collection level on save; 3 also merges duplicate
+                    objects, which takes minutes on thousands of pages
+    :return: int, number of pages in the merged file
+    """
+    merged = fitz.open()
+    try:
+        for pdf_path in pdf_paths:
+            with fitz.open(pdf_path) as part:
+                merged.insert_pdf(part)
+        merged.save(output_path, garbage=garbage, deflate=True)
+        return merged.page_count
+    finally:
+        merged.close()
+
+
+def merge_pdf_bytes(pdf_parts, output_path):
+    """
+    Concatenate several in-memory PDF documents into one file, in the given order.
+
+    :param pdf_parts: list of bytes, PDF documents to merge
+    :param output_path: str, path to the merged PDF file
+    :return: int, number of pages in the merged file
+    :raises ValueError: if a part is empty (e.g. from a failed render), rather than writing a
+                        file with pages missing
+    """
+    merged = fitz.open()
+    try:
+        for index, pdf_bytes in enumerate(pdf_parts):
+            if not pdf_bytes:
+                raise ValueError(f"PDF part {index + 1} of {len(pdf_parts)} is empty")
+            with fitz.open(stream=pdf_bytes, filetype='pdf') as part:
+                merged.insert_pdf(part)
+        merged.save(output_path, garbage=3, deflate=True)
+        return merged.page_count
+    finally:
+        merged.close()
+
+
+def init_html_worker(font_path, font_name):
+    """
+    Register the font for xhtml2pdf; process pool initializer of the chunked HTML renderers.
+
+    :param font_path: str, path to the TTF font file
+    :param font_name: str, name under which the font is referenced in CSS
+    """
+    # Imported here so merging PDFs does not load reportlab/xhtml2pdf
+    from .font_registry import configure_html_fonts, register_font
+    register_font(font_path, font_name)
+    configure_html_fonts(font_name)
+
+
+def render_html_chunk(html_content, **pisa_options):
+    """
+    Render one HTML document to PDF bytes with xhtml2pdf.
+
+    :param html_content: str, complete HTML document
+    :param pisa_options: extra keyword arguments for pisa.CreatePDF (e.g. path, page_size),
+                         passed through unchanged so each converter keeps its own call
+    :return: (bool, bytes), error flag and the rendered PDF
+    """
+    from xhtml2pdf import pisa
+    buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(html_content, dest=buffer, encoding='utf-8', **pisa_options)
+    return pisa_status.err, buffer.getvalue()
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 29 14:34:31 2024
+
+@author: Ken
+"""
+
+import os
+import base64
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from html import escape
+from PIL import Image
+from io import BytesIO
+from xhtml2pdf import pisa
+from .font_registry import DEFAULT_FONT_NAME, configure_html_fonts, register_font
+from .instrumentation import Instrumentation
+from .pdf_utils import init_html_worker, merge_pdf_bytes, render_html_chunk
+
+logger = logging.getLogger(__name__)
+
+class PPTToPDFConverter:
+
+    # Resized images shared between decks (enabled per converter with share_image_cache)
+    shared_image_cache = OrderedDict()
+    shared_image_cache_size = 256
+    _shared_image_cache_lock = threading.Lock()
+    
+    def __init__(self, pptx_file_path, output_pdf_path, font_path, font_name=DEFAULT_FONT_NAME,
+                 image_format='png', jpeg_quality=85, image_workers=4, share_image_cache=False, instrumentation=None):
+        """
+        Initialize the PPTToPDFConverter class.
+        
+        :param pptx_file_path: str, path to the input PPTX file
+        :param output_pdf_path: str, path to the output PDF file
+        :param font_path: str, path to the font file
+        :param font_name: str, name under which the font is registered and referenced in CSS
+        :param image_format: str, encoding of resized pictures: 'png', 'jpeg', or 'auto' (JPEG for JPEG sources, PNG otherwise)
+        :param jpeg_quality: int, 1-100, quality of JPEG-encoded pictures
+        :param image_workers: int, number of threads resizing pictures
+        :param share_image_cache: bool, reuse resized pictures across decks converted in this process
+        :param instrumentation: Instrumentation, receives stage timings and counts (optional)
+        """
+        if image_format not in ('png', 'jpeg', 'auto'):
+            raise ValueError(f"Unsupported image format: {image_format}. Choose from 'png', 'jpeg' or 'auto'.")
+        self.pptx_file_path = pptx_file_path
+        self.output_pdf_path = output_pdf_path
+        self.font_path = font_path
+        self.font_name = font_name
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self.image_workers = image_workers
+        self.share_image_cache = share_image_cache
+        self.instrumentation = instrumentation or Instrumentation()
+    
+    def split_text_to_paragraphs(self, text, max_length=61):
+        lines = []
+        while len(text) > max_length:
+            split_pos = text.rfind(' ', 0, max_length)
+            if split_pos == -1:
+                split_pos = max_length
+            lines.append(text[:split_pos])
+            text = text[split_pos:].strip()
+        lines.append(text)
+        return lines
+
+    def resize_image(self, image_data, max_width, max_height, image_format="PNG", quality=85):
+        image = Image.open(BytesIO(image_data))
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+        buffer = BytesIO()
+        if image_format == "JPEG":
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG has no alpha channel: flatten transparent areas onto white
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        else:
+            image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def encode_image(self, image_data, content_type, max_width=480, max_height=320):
+        # Resize a picture and return its data URI
+        if self.image_format == 'jpeg' or (self.image_format == 'auto' and content_type in ('image/jpeg', 'image/jpg')):
+            image_format, mime_type = "JPEG", "image/jpeg"
+        else:
+            image_format, mime_type = "PNG", "image/png"
+        resized_image_data = self.resize_image(image_data, max_width, max_height, image_format, self.jpeg_quality)
+        image_base64 = base64.b64encode(resized_image_data).decode('utf-8')
+        return f"data:{mime_type};base64,{image_base64}"
+
+    def _image_cache_key(self, image):
+        # Pictures are identified by content hash plus everything that affects the encoded result
+        return (image.sha1, self.image_format, self.jpeg_quality)
+
+    def _get_shared_image(self, key):
+        with self._shared_image_cache_lock:
+            data_uri = self.shared_image_cache.get(key)
+            if data_uri is not None:
+                self.shared_image_cache.move_to_end(key)
+            return data_uri
+
+    def _put_shared_image(self, key, data_uri):
+        with self._shared_image_cache_lock:
+            self.shared_image_cache[key] = data_uri
+            self.shared_image_cache.move_to_end(key)
+            while len(self.shared_image_cache) > self.shared_image_cache_size:
+                self.shared_image_cache.popitem(last=False)
+
+    def build_html_parts(self):
+        """
+        Build the HTML of the deck in memory.
+
+        :return: tuple (head, slides), where head is the document head plus the opening <body>
+                 and slides is a list with the HTML of each slide; a complete document is
+                 head, any run of slides and "</body>" joined by newlines
+        """
+        with self.instrumentation.stage('parse', bytes=os.path.getsize(self.pptx_file_path)):
+            prs = Presentation(self.pptx_file_path)
+        head = f"""
+        <head>
+            <meta charset="UTF-8">
+            <style type="text/css">
+                @page {{
+                    size: A4 landscape;
+                    margin: 20mm; 
+                }}
+                body {{
+                    font-family: '{self.font_name}'; 
+                    font-size: 12pt; 
+                    margin: 0; 
+                    padding: 0; 
+                    white-space: normal;
+                    word-wrap: break-word;
+                    overflow-x: hidden;
+                }}
+                .slide {{
+                    width: 257mm; 
+                    height: auto; 
+                    margin: 0 auto; 
+                    padding: 0;
+                    overflow: hidden;
+                    page-break-inside: avoid;
+                    page-break-after: always;
+                    display: block;
+                    clear: both;
+                    position: relative;
+                    box-sizing: border-box;
+                }}
+                table {{
+                    width: 80%; 
+                    border-collapse: collapse;
+                    margin: 20px auto; 
+                    page-break-inside: avoid; 
+                }}
+                th, td {{
+                    border: 1px solid black;
+                    padding: 8px;
+                    text-align: left;
+                    page-break-inside: avoid;
+                }}
+                p {{
+                    margin: 0; 
+                    padding: 5px 0; 
+                }}
+                img {{
+                    display: block;
+                    margin: 0 auto;
+                    max-width: 100%;
+                    max-height: 100%;
+                    height: auto;
+                    width: auto;
+                }}
+            </style>
+        </head>
+        <body>
+        """
+        slides = []
+
+        # Each distinct picture is resized once per deck (content hash), in a thread pool;
+        # <img> tags are filled in once all pictures are done
+        images = {}
+        image_slots = []
+        executor = ThreadPoolExecutor(max_workers=self.image_workers)
+
+        with self.instrumentation.stage('slides') as stage:
+            for slide_number, slide in enumerate(prs.slides):
+                html_output = [f"<div class='slide' id='slide-{slide_number}'>"]
+                slides.append(html_output)
+
+                for shape in slide.shapes:
+                    if shape.has_text_frame:
+                        for paragraph in shape.text_frame.paragraphs:
+                            text = escape(paragraph.text)
+                            split_paragraphs = self.split_text_to_paragraphs(text)
+                            for line in split_paragraphs:
+                                html_output.append(f"<p>{line}</p>")
+                
+                    elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                        image = shape.image
+                        key = self._image_cache_key(image)
+                        if key not in images:
+                            cached = self._get_shared_image(key) if self.share_image_cache else None
+                            images[key] = cached or executor.submit(self.encode_image, image.blob, image.content_type)
+                        image_slots.append((slide_number, len(html_output), key))
+                        html_output.append(None)
+
+                    elif shape.has_table:
+                        table = shape.table
+                        html_output.append("<table>")
+                        for row in table.rows:
+                            html_output.append("<tr>")
+                            for cell in row.cells:
+                                cell_text = escape(cell.text)
+                                split_paragraphs = self.split_text_to_paragraphs(cell_text)
+                                for line in split_paragraphs:
+                                    html_output.append(f"<td><p>{line}</p></td>")
+                            html_output.append("</tr>")
+                        html_output.append("</table>")
+
+                html_output.append("</div>")
+            stage['slides'] = len(slides)
+
+        # Pictures are resized while the slides are walked; this stage is the remaining wait
+        with self.instrumentation.stage('images', images=len(images)):
+            try:
+                for key, image in images.items():
+                    if isinstance(image, Future):
+                        images[key] = image.result()
+                        if self.share_image_cache:
+                            self._put_shared_image(key, images[key])
+            finally:
+                executor.shutdown(cancel_futures=True)
+        self.instrumentation.count('slides', len(slides))
+        self.instrumentation.count('images', len(images))
+        for slide_number, position, key in image_slots:
+            slides[slide_number][position] = f"<img src='{images[key]}' alt='Slide Image' />"
+
+        return head, ["\n".join(html_output) for html_output in slides]
+
+    def pptx_to_html(self, output_dir):
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        head, slides = self.build_html_parts()
+        html_content = "\n".join([head, *slides, "</body>"])
+        html_file_path = os.path.join(output_dir, "presentation.html")
+
+        with open(html_file_path, 'w', encoding='utf-8') as html_file:
+            html_file.write(html_content)
+
+        return html_file_path
+
+    def convert_html_to_pdf(self, html_path):
+        with open(html_path, 'r', encoding='utf-8') as html_file:
+            html_content = html_file.read()
+        return self.convert_html_content_to_pdf(html_content)
+
+    def convert_html_content_to_pdf(self, html_content):
+        # Render an in-memory HTML document to the output PDF
+        os.makedirs(os.path.dirname(self.output_pdf_path) or ".", exist_ok=True)
+        register_font(self.font_path, self.font_name)
+        configure_html_fonts(self.font_name)
+
+        with self.instrumentation.stage('layout', html_chars=len(html_content)) as stage:
+            with open(self.output_pdf_path, 'wb') as pdf_file:
+                pisa_status = pisa.CreatePDF(
+                    html_content,
+                    dest=pdf_file,
+                    encoding='utf-8',
+                )
+            stage['bytes'] = os.path.getsize(self.output_pdf_path)
+
+        if pisa_status.err:
+            logger.error("Error converting HTML to PDF.")
+        else:
+            logger.info(f"PDF file has been created at {self.output_pdf_path}")
+        return pisa_status.err
+
+    def convert_chunks_to_pdf(self, head, slides, chunk_size, max_workers=1):
+        """
+        Render the slides in chunks of chunk_size and concatenate the resulting PDFs.
+
+        xhtml2pdf lays out one chunk at a time, so its memory grows with the chunk rather than
+        with the deck; with max_workers > 1 chunks are laid out in parallel processes.
+
+        :param head: str, document head from build_html_parts
+        :param slides: list of str, slide HTML from build_html_parts
+        :param chunk_size: int, number of slides per chunk
+        :param max_workers: int, number of worker processes (1 renders in-process)
+        :return: int, number of chunks that failed to render
+        """
+        chunks = ["\n".join([head, *slides[start:start + chunk_size], "</body>"])
+                  for start in range(0, len(slides), chunk_size)]
+
+        with self.instrumentation.stage('layout', chunks=len(chunks), workers=max_workers):
+            if max_workers > 1 and len(chunks) > 1:
+                with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)), initializer=init_html_worker,
+                                         initargs=(self.font_path, self.font_name)) as executor:
+                    results = list(executor.map(render_html_chunk, chunks))
+            else:
+                init_html_worker(self.font_path, self.font_name)
+                results = [render_html_chunk(chunk) for chunk in chunks]
+
+        errors = sum(1 for err, _ in results if err)
+        os.makedirs(os.path.dirname(self.output_pdf_path) or ".", exist_ok=True)
+        with self.instrumentation.stage('merge', parts=len(results)) as stage:
+            page_count = merge_pdf_bytes([pdf_bytes for _, pdf_bytes in results], self.output_pdf_path)
+            stage.update(pages=page_count, bytes=os.path.getsize(self.output_pdf_path))
+        self.instrumentation.count('chunks', len(chunks))
+        self.instrumentation.count('pages', page_count)
+
+        if errors:
+            logger.error(f"Error converting HTML to PDF in {errors} of {len(chunks)} chunk(s).")
+        else:
+            logger.info(f"PDF file has been created at {self.output_pdf_path}")
+        return errors
+
+    def convert_ppt_to_pdf(self, chunk_size=None, max_workers=1, engine='html'):
+        """
+        Convert the deck to PDF.
+
+        :param chunk_size: int, render this many slides per xhtml2pdf run and merge the parts
+                           (default: the whole deck in one run; html engine only)
+        :param max_workers: int, number of processes rendering chunks in parallel (html engine only)
+        :param engine: str, 'html' lays the slides out through in-memory HTML and xhtml2pdf;
+                       'reportlab' draws each slide directly on a ReportLab canvas at the
+                       original shape positions (see PPTXCanvasRenderer)
+        :return: int, number of HTML -> PDF runs that reported errors (0 on success); the PDF
+                 may then be incomplete
+        """
+        if engine not in ('html', 'reportlab'):
+            raise ValueError(f"Unknown engine: {engine}. Choose 'html' or 'reportlab'.")
+
+        errors = 0
+        with self.instrumentation.run('ppt', input=self.pptx_file_path, output=self.output_pdf_path, engine=engine):
+            if engine == 'reportlab':
+                from .pptx_canvas_renderer import PPTXCanvasRenderer
+                os.makedirs(os.path.dirname(self.output_pdf_path) or ".", exist_ok=True)
+                register_font(self.font_path, self.font_name)
+                with self.instrumentation.stage('render', bytes=os.path.getsize(self.pptx_file_path)) as stage:
+                    slide_count = PPTXCanvasRenderer(self.font_name).render(self.pptx_file_path, self.output_pdf_path)
+                    stage['slides'] = slide_count
+                self.instrumentation.count('slides', slide_count)
+                self.instrumentation.count('pages', slide_count)
+                logger.info(f"PDF file has been created at {self.output_pdf_path} ({slide_count} slides)")
+            else:
+                head, slides = self.build_html_parts()
+                if chunk_size and len(slides) > chunk_size:
+                    errors = self.convert_chunks_to_pdf(head, slides, chunk_size, max_workers)
+                elif self.convert_html_content_to_pdf("\n".join([head, *slides, "</body>"])):
+                    errors = 1
+        if not errors:
+            logger.info("Conversion from PPTX to PDF completed.")
+        return errors
+
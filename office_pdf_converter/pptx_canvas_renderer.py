@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Direct ReportLab renderer for PPTX decks.
+
+Walks prs.slides and draws text frames, pictures and tables straight onto a ReportLab
+canvas at the positions and sizes stored in the deck, one PDF page per slide, without
+the HTML/xhtml2pdf layout step used by PPTToPDFConverter's default engine.
+"""
+
+from io import BytesIO
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.text import PP_ALIGN
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfgen import canvas
+
+EMU_PER_POINT = 12700
+
+
+class PPTXCanvasRenderer:
+    def __init__(self, font_name, default_font_size=18, table_font_size=12, line_spacing=1.2):
+        """
+        Initialize the PPTXCanvasRenderer class.
+
+        :param font_name: str, registered ReportLab font used for all text
+        :param default_font_size: float, font size (pt) of runs that do not set one
+        :param table_font_size: float, font size (pt) of table cells that do not set one
+        :param line_spacing: float, line height as a multiple of the font size
+        """
+        self.font_name = font_name
+        self.default_font_size = default_font_size
+        self.table_font_size = table_font_size
+        self.line_spacing = line_spacing
+
+    def render(self, pptx_file_path, output_pdf_path):
+        """
+        Render every slide of a deck to one PDF page sized like the slide.
+
+        :param pptx_file_path: str, path to the input PPTX file
+        :param output_pdf_path: str, path to the output PDF file
+        :return: int, number of slides rendered
+        """
+        prs = Presentation(pptx_file_path)
+        page_width = prs.slide_width / EMU_PER_POINT
+        page_height = prs.slide_height / EMU_PER_POINT
+        c = canvas.Canvas(output_pdf_path, pagesize=(page_width, page_height))
+
+        slide_count = 0
+        for slide in prs.slides:
+            # Identity transform from slide EMU to points; y is flipped when drawing
+            self._draw_shapes(c, slide.shapes, (1.0, 1.0, 0.0, 0.0), page_height)
+            c.showPage()
+            slide_count += 1
+        c.save()
+        return slide_count
+
+    def _box(self, shape, transform, page_height):
+        # Shape bounds in PDF points: (x, y_bottom, width, height)
+        scale_x, scale_y, offset_x, offset_y = transform
+        left = ((shape.left or 0) * scale_x + offset_x) / EMU_PER_POINT
+        top = ((shape.top or 0) * scale_y + offset_y) / EMU_PER_POINT
+        width = (shape.width or 0) * scale_x / EMU_PER_POINT
+        height = (shape.height or 0) * scale_y / EMU_PER_POINT
+        return left, page_height - top - height, width, height
+
+    def _group_transform(self, group, transform):
+        # Compose the parent transform with the group's child-coordinate mapping (a:chOff/a:chExt)
+        xfrm = group._element.grpSpPr.xfrm
+        if xfrm is None or xfrm.chExt is None or xfrm.chOff is None or not xfrm.chExt.cx or not xfrm.chExt.cy:
+            return transform
+        scale_x, scale_y, offset_x, offset_y = transform
+        child_scale_x = xfrm.ext.cx / xfrm.chExt.cx
+        child_scale_y = xfrm.ext.cy / xfrm.chExt.cy
+        child_offset_x = xfrm.off.x - xfrm.chOff.x * child_scale_x
+        child_offset_y = xfrm.off.y - xfrm.chOff.y * child_scale_y
+        return (scale_x * child_scale_x, scale_y * child_scale_y,
+                scale_x * child_offset_x + offset_x, scale_y * child_offset_y + offset_y)
+
+    def _draw_shapes(self, c, shapes, transform, page_height):
+        for shape in shapes:
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                self._draw_shapes(c, shape.shapes, self._group_transform(shape, transform), page_height)
+            elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                self._draw_picture(c, shape, self._box(shape, transform, page_height))
+            elif getattr(shape, 'has_table', False) and shape.has_table:
+                self._draw_table(c, shape, transform, page_height)
+            elif shape.has_text_frame:
+                self._draw_text_frame(c, shape.text_frame, self._box(shape, transform, page_height), self.default_font_size)
+
+    def _draw_picture(self, c, shape, box):
+        x, y, width, height = box
+        try:
+            image = ImageReader(BytesIO(shape.image.blob))
+            c.drawImage(image, x, y, width, height, mask='auto')
+        except Exception:
+            # Formats PIL cannot decode (EMF/WMF): mark the picture area instead of failing the slide
+            c.setStrokeColorRGB(0.6, 0.6, 0.6)
+            c.rect(x, y, width, height, stroke=1, fill=0)
+
+    def _draw_table(self, c, shape, transform, page_height):
+        x, y, width, height = self._box(shape, transform, page_height)
+        scale_x, scale_y = transform[0], transform[1]
+        table = shape.table
+        col_widths = [column.width * scale_x / EMU_PER_POINT for column in table.columns]
+        row_heights = [row.height * scale_y / EMU_PER_POINT for row in table.rows]
+
+        c.setStrokeColorRGB(0, 0, 0)
+        for row_index, row in enumerate(table.rows):
+            row_top = y + height - sum(row_heights[:row_index])
+            for col_index, cell in enumerate(row.cells):
+                if cell.is_spanned:
+                    # Covered by a merged cell drawn from its origin
+                    continue
+                span_cols = cell.span_width if cell.is_merge_origin else 1
+                span_rows = cell.span_height if cell.is_merge_origin else 1
+                cell_left = x + sum(col_widths[:col_index])
+                cell_width = sum(col_widths[col_index:col_index + span_cols])
+                cell_height = sum(row_heights[row_index:row_index + span_rows])
+                cell_box = (cell_left, row_top - cell_height, cell_width, cell_height)
+                c.rect(*cell_box, stroke=1, fill=0)
+                self._draw_text_frame(c, cell.text_frame, cell_box, self.table_font_size)
+
+    def _draw_text_frame(self, c, text_frame, box, default_font_size):
+        x, y, width, height = box
+        inset_left = (text_frame.margin_left or 0) / EMU_PER_POINT
+        inset_right = (text_frame.margin_right or 0) / EMU_PER_POINT
+        inset_top = (text_frame.margin_top or 0) / EMU_PER_POINT
+        text_width = max(width - inset_left - inset_right, 1)
+        cursor_y = y + height - inset_top
+
+        c.setFillColorRGB(0, 0, 0)
+        for paragraph in text_frame.paragraphs:
+            font_size = default_font_size
+            for run in paragraph.runs:
+                if run.font.size is not None:
+                    font_size = run.font.size.pt
+                    break
+            line_height = font_size * self.line_spacing
+            lines = simpleSplit(paragraph.text, self.font_name, font_size, text_width) if paragraph.text else ['']
+            c.setFont(self.font_name, font_size)
+            for line in lines:
+                cursor_y -= line_height
+                if paragraph.alignment == PP_ALIGN.CENTER:
+                    c.drawCentredString(x + inset_left + text_width / 2, cursor_y, line)
+                elif paragraph.alignment == PP_ALIGN.RIGHT:
+                    c.drawRightString(x + inset_left + text_width, cursor_y, line)
+                else:
+                    c.drawString(x + inset_left, cursor_y, line)
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 24 23:55:36 2024
+
+@author: Ken
+"""
+
+import base64
+import functools
+import hashlib
+import logging
+import mammoth
+import mimetypes
+import os
+import tempfile
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from PIL import Image
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from xhtml2pdf import pisa
+from .font_registry import DEFAULT_FONT_NAME, configure_html_fonts, register_font
+from .instrumentation import Instrumentation
+from .pdf_utils import init_html_worker, merge_pdf_bytes, render_html_chunk
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401  (only checks that the faster parser backend is available)
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+class WordToPDFConverter:
+    def __init__(self, input_file_path, pdf_file_path, font_path, font_name=DEFAULT_FONT_NAME,
+                 image_dpi=150, printable_width_in=6.5, instrumentation=None):
+        """
+        Initialize the WordToPDFConverter class.
+        
+        :param input_file_path: str, path to the input Word file
+        :param pdf_file_path: str, full path to where the output PDF file will be saved
+        :param font_path: str, path to the font file for PDF conversion
+        :param font_name: str, name under which the font is registered and referenced in CSS
+        :param image_dpi: int, resolution at which embedded images are kept when printed full width
+        :param printable_width_in: float, printable page width in inches; images wider than
+                                   printable_width_in * image_dpi pixels are downscaled to it
+        :param instrumentation: Instrumentation, receives stage timings and counts (optional)
+        """
+        self.input_file_path = input_file_path
+        self.pdf_file_path = pdf_file_path
+        self.font_path = font_path
+        self.font_name = font_name
+        self.image_dpi = image_dpi
+        self.printable_width_in = printable_width_in
+        self.instrumentation = instrumentation or Instrumentation()
+
+    def convert_docx_to_html(self, max_line_length=43, list_line_length=37, image_dir=None):
+        """
+        Convert DOCX to HTML in-memory string.
+
+        Embedded images are downscaled to the printable width and deduplicated by content hash.
+        With image_dir they are written there once each and referenced by file name (pass the
+        same folder to convert_html_to_pdf as base_dir); otherwise they are inlined as
+        (downscaled) data URIs.
+
+        :param max_line_length: int, line length used to wrap paragraphs
+        :param list_line_length: int, line length used to wrap list items
+        :param image_dir: str, existing folder for the extracted images (must outlive the PDF rendering)
+        :return: str, complete HTML document
+        """
+        soup = self.convert_docx_to_soup(max_line_length, list_line_length, image_dir)
+        return self.build_html_document(self.body_content(soup))
+
+    def convert_docx_to_soup(self, max_line_length=43, list_line_length=37, image_dir=None):
+        # Convert DOCX to a processed BeautifulSoup tree (see convert_docx_to_html for the parameters)
+        images = {}
+        convert_image = mammoth.images.img_element(lambda image: self._convert_image(image, image_dir, images))
+        with open(self.input_file_path, "rb") as docx_file:
+            with self.instrumentation.stage('parse', bytes=os.path.getsize(self.input_file_path)) as stage:
+                result = mammoth.convert_to_html(docx_file, convert_image=convert_image)
+                html_content = result.value
+                stage.update(images=len(images), html_chars=len(html_content))
+            
+            # Parse and process HTML
+            with self.instrumentation.stage('postprocess'):
+                soup = BeautifulSoup(html_content, HTML_PARSER)
+                self._process_html(soup, max_line_length, list_line_length)
+
+        return soup
+
+    def body_content(self, soup):
+        # lxml wraps the fragment in <html><body>; only the body content is wanted here
+        return soup.body.decode_contents() if soup.body else str(soup)
+
+    def build_html_document(self, body_content):
+        # Wrap body HTML in the document head and stylesheet used for PDF rendering
+        style_content = f"""
+            <head>
+              <meta charset="UTF-8"> 
+              <style type="text/css">
+                body {{
+                font-family: '{self.font_name}'; 
+                font-size: 12pt; 
+                max-width: 794px; 
+                margin: 0 auto; 
+                padding: 10px; 
+                white-space: normal;
+                word-wrap: break-word;
+                }}
+                .table-container {{
+                    max-width: 100%; 
+                    padding: 0 50px; 
+                }}
+                table {{
+                    width: 80%; 
+                    border-collapse: collapse;
+                    margin: 20px auto; 
+                }}
+                th, td {{
+                    border: 1px solid black;
+                    padding: 8px;
+                    text-align: left;
+                }}
+                p {{
+                    margin: 0; 
+                    padding: 5px 0; 
+                }}
+                li {{
+                    margin-bottom: 5px; 
+                    white-space: pre-wrap; 
+                }}
+                img {{
+                    display: block;
+                    margin: 10px 0;
+                    max-width: 100%; 
+                    height: auto;
+                }}
+              </style>
+            </head>
+            """
+
+        return f"{style_content}\n<body>\n{body_content}\n</body>\n"
+
+    def _convert_image(self, image, image_dir, images):
+        # mammoth image hook: returns the <img> attributes for one embedded image
+        with image.open() as image_file:
+            image_data = image_file.read()
+        key = hashlib.sha1(image_data).hexdigest()
+        src = images.get(key)
+        if src is None:
+            image_data, content_type = self.downscale_image(image_data, image.content_type)
+            self.instrumentation.count('images')
+            self.instrumentation.count('image_bytes', len(image_data))
+            if image_dir is not None:
+                src = f"{key}{mimetypes.guess_extension(content_type) or '.bin'}"
+                with open(os.path.join(image_dir, src), "wb") as output_file:
+                    output_file.write(image_data)
+            else:
+                src = f"data:{content_type};base64,{base64.b64encode(image_data).decode('ascii')}"
+            images[key] = src
+        return {"src": src}
+
+    def downscale_image(self, image_data, content_type):
+        """
+        Shrink an image to the printable width at image_dpi, keeping its aspect ratio.
+
+        Images that are already small enough, or that PIL cannot decode (e.g. EMF/WMF),
+        are returned unchanged.
+
+        :return: tuple (bytes, content type)
+        """
+        max_width = int(self.printable_width_in * self.image_dpi)
+        try:
+            image = Image.open(BytesIO(image_data))
+            if image.width <= max_width:
+                return image_data, content_type
+            image.thumbnail((max_width, max_width * image.height // image.width + 1), Image.LANCZOS)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return image_data, content_type
+
+        buffer = BytesIO()
+        try:
+            if content_type == "image/jpeg" and image.mode in ("RGB", "L", "CMYK"):
+                image.save(buffer, format="JPEG", quality=85, optimize=True)
+                return buffer.getvalue(), "image/jpeg"
+            if image.mode not in ("1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"):
+                # PNG cannot store e.g. CMYK, YCbCr or LAB images
+                image = image.convert("RGBA" if image.mode.upper().endswith("A") else "RGB")
+            image.save(buffer, format="PNG", optimize=True)
+        except (OSError, ValueError):
+            return image_data, content_type
+        return buffer.getvalue(), "image/png"
+
+    def _process_html(self, soup, max_line_length, list_line_length):
+        transform_html(soup, max_line_length, list_line_length)
+
+    def convert_html_to_pdf(self, html_content, base_dir=None):
+        # base_dir: folder that relative image references (see convert_docx_to_html) resolve against
+        # Ensure custom font is registered (parsed once per process)
+        register_font(self.font_path, self.font_name)
+        configure_html_fonts(self.font_name)
+
+        # Convert in-memory HTML to PDF
+        with self.instrumentation.stage('layout', html_chars=len(html_content)) as stage:
+            with open(self.pdf_file_path, 'wb') as pdf_file:
+                pisa_status = pisa.CreatePDF(
+                    html_content,                  
+                    dest=pdf_file,                  
+                    encoding='utf-8',
+                    page_size='A4',               
+                    path=os.path.join(base_dir, "document.html") if base_dir else None,
+                )
+            stage['bytes'] = os.path.getsize(self.pdf_file_path)
+
+        if pisa_status.err:
+            logger.error("Error occurred during HTML to PDF conversion.")
+        else:
+            logger.info(f"PDF file has been saved to: {self.pdf_file_path}")
+
+        return pisa_status.err
+
+    def split_into_chunks(self, soup, chunk_chars):
+        """
+        Split the document body into chunks at section boundaries.
+
+        A new chunk starts at a heading (h1-h3) or at an element with a CSS page break, but only
+        once the current chunk holds at least chunk_chars characters of HTML, so short sections
+        are grouped together.
+
+        :param soup: BeautifulSoup, processed document from convert_docx_to_soup
+        :param chunk_chars: int, target chunk size in characters of HTML
+        :return: list of str, body HTML of each chunk
+        """
+        root = soup.body or soup
+        chunks, current, current_size = [], [], 0
+        for element in root.contents:
+            element_html = str(element)
+            if current and current_size >= chunk_chars and _is_section_boundary(element):
+                chunks.append("".join(current))
+                current, current_size = [], 0
+            current.append(element_html)
+            current_size += len(element_html)
+        if current:
+            chunks.append("".join(current))
+        return chunks
+
+    def convert_chunks_to_pdf(self, chunks, base_dir=None, max_workers=1):
+        """
+        Render each chunk with its own xhtml2pdf run and merge the results into the output PDF.
+
+        Every chunk starts on a new page. With max_workers > 1 the chunks are laid out in
+        parallel processes.
+
+        :param chunks: list of str, body HTML from split_into_chunks
+        :param base_dir: str, folder that relative image references resolve against
+        :param max_workers: int, number of worker processes (1 renders in-process)
+        :return: int, number of chunks that failed to render
+        """
+        documents = [self.build_html_document(chunk) for chunk in chunks]
+        render = functools.partial(render_html_chunk, page_size='A4',
+                                   path=os.path.join(base_dir, "document.html") if base_dir else None)
+        with self.instrumentation.stage('layout', chunks=len(documents), workers=max_workers):
+            if max_workers > 1 and len(documents) > 1:
+                with ProcessPoolExecutor(max_workers=min(max_workers, len(documents)), initializer=init_html_worker,
+                                         initargs=(self.font_path, self.font_name)) as executor:
+                    results = list(executor.map(render, documents))
+            else:
+                init_html_worker(self.font_path, self.font_name)
+                results = [render(document) for document in documents]
+
+        errors = sum(1 for err, _ in results if err)
+        with self.instrumentation.stage('merge', parts=len(results)) as stage:
+            page_count = merge_pdf_bytes([pdf_bytes for _, pdf_bytes in results], self.pdf_file_path)
+            stage.update(pages=page_count, bytes=os.path.getsize(self.pdf_file_path))
+        self.instrumentation.count('chunks', len(documents))
+        self.instrumentation.count('pages', page_count)
+
+        if errors:
+            logger.error(f"Error occurred during HTML to PDF conversion in {errors} of {len(documents)} chunk(s).")
+        else:
+            logger.info(f"PDF file has been saved to: {self.pdf_file_path}")
+        return errors
+
+    def convert_word_to_pdf(self, chunk_chars=None, max_workers=1):
+        """
+        Convert the Word file to PDF.
+
+        :param chunk_chars: int, render the document in chunks of about this many characters of
+                            HTML, split at headings/page breaks, to bound xhtml2pdf's memory
+                            (default: the whole document in one run)
+        :param max_workers: int, number of processes rendering chunks in parallel
+        :return: int, number of HTML -> PDF runs that reported errors (0 on success); the PDF
+                 may then be incomplete
+        """
+        # Images are referenced from a temporary folder that lives until the PDF is written
+        with self.instrumentation.run('word', input=self.input_file_path, output=self.pdf_file_path), \
+                tempfile.TemporaryDirectory() as image_dir:
+            if chunk_chars:
+                soup = self.convert_docx_to_soup(image_dir=image_dir)
+                return self.convert_chunks_to_pdf(self.split_into_chunks(soup, chunk_chars), image_dir, max_workers)
+            html_content = self.convert_docx_to_html(image_dir=image_dir)
+            return 1 if self.convert_html_to_pdf(html_content, base_dir=image_dir) else 0
+
+
+def _is_section_boundary(element):
+    # Headings and elements with an explicit CSS page break start a new section
+    if not isinstance(element, Tag):
+        return False
+    if element.name in ('h1', 'h2', 'h3'):
+        return True
+    style = element.get('style', '').replace(' ', '').lower()
+    return 'page-break-before:always' in style or 'break-before:page' in style
+
+
+# Function Definitions
+def transform_html(soup, max_line_length, list_line_length):
+    """
+    Clean up the HTML produced by mammoth for xhtml2pdf, in place.
+
+    Nested lists are flattened, empty <p>/<li>/<ul>/<ol> tags (no text and no image) are
+    removed, every <img> is wrapped in its own <p>, trailing <br> tags are dropped and the
+    text of paragraphs and list items is wrapped at max_line_length / list_line_length.
+
+    One depth-first walk flattens each list on entry, decides emptiness bottom-up from the
+    children (instead of calling get_text on every tag) and collects <br>, <p> and <li> tags
+    in document order; the line breaking and <br> cleanup then run over those lists only.
+    """
+    brs, paragraphs, items = [], [], []
+    _transform_node(soup, soup, brs, paragraphs, items)
+
+    # Tags removed from the tree in the meantime have no parent and are skipped
+    for br in brs:
+        if br.parent is not None and not br.next_sibling:
+            br.extract()
+    for p in paragraphs:
+        if p.parent is not None and p.string:
+            p.string.replace_with("\n".join(textwrap.wrap(p.text, max_line_length)))
+    for li in items:
+        if li.parent is not None:
+            li_text = li.get_text(separator=' ', strip=True)
+            wrapped_text = "\n".join(textwrap.wrap(li_text, list_line_length))
+            li.clear()
+            li.append(wrapped_text)
+
+
+def _transform_node(soup, tag, brs, paragraphs, items):
+    # Returns (has_text, has_img) for the subtree below tag, after removing empty descendants
+    if tag.name in ('ul', 'ol'):
+        _flatten_list(tag)
+    if tag.name == 'br':
+        brs.append(tag)
+    elif tag.name == 'p':
+        paragraphs.append(tag)
+    elif tag.name == 'li':
+        items.append(tag)
+
+    has_text = has_img = False
+    # Iterate over a snapshot: empty children are removed from tag along the way
+    for child in list(tag.children):
+        if isinstance(child, Tag):
+            child_text, child_img = _transform_node(soup, child, brs, paragraphs, items)
+            if child.name in ('p', 'li', 'ul', 'ol') and not child_text and not child_img:
+                child.decompose()
+                continue
+            if child.name == 'img':
+                child.wrap(soup.new_tag('p'))
+                child_img = True
+            has_text = has_text or child_text
+            has_img = has_img or child_img
+        elif type(child) in (NavigableString, CData) and child.strip():
+            has_text = True
+    return has_text, has_img
+
+
+def _flatten_list(list_tag):
+    # Move the items of every list nested in list_tag up into list_tag
+    while True:
+        nested = list_tag.find(['ul', 'ol'])
+        if not nested:
+            break
+        for li in nested.find_all('li', recursive=False):
+            list_tag.append(li)
+        nested.decompose()
+
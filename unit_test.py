@@ -5,12 +5,16 @@ Created on Thu Oct 24 22:02:59 2024
 @author: Ken
 """
 
+import logging
 import sys
 sys.path.append(r"C:\Users\Ken\Desktop\Test\Code")
-from excel_to_pdf_converter import ExcelToPDFConverter
-from pdf_to_Image_converter import PDFToImageConverter
-from word_to_pdf_converter import WordToPDFConverter
-from ppt_to_pdf_converter import PPTToPDFConverter
+from office_pdf_converter.excel_to_pdf_converter import ExcelToPDFConverter
+from office_pdf_converter.pdf_to_Image_converter import PDFToImageConverter
+from office_pdf_converter.word_to_pdf_converter import WordToPDFConverter
+from office_pdf_converter.ppt_to_pdf_converter import PPTToPDFConverter
+
+# The converters report progress through logging
+logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 
 # Example usage